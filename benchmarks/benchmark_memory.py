@@ -0,0 +1,59 @@
+"""Peak memory (RSS) of PLS_SIMPLS.train (SIMPLS solver) on wide synthetic data.
+
+Each size is trained in a new Python process, so the peak RSS (resource.getrusage) of one size does not carry over to the next. The working memory of train (the peak RSS minus the RSS once X is in memory) has to stay within the budget, which is linear in the number of features. A dense n_features x n_features matrix (e.g. a full SVD of the covariance vector) would exceed it.
+
+    python benchmarks/benchmark_memory.py
+"""
+import resource
+import subprocess
+import sys
+
+N_SAMPLES = 200
+N_FEATURES = [5000, 20000, 100000]
+N_COMPONENTS = 5
+
+# Working memory budget: 2 copies of X (e.g. the centered X) plus 32 MB
+BUDGET_X_COPIES = 2
+BUDGET_EXTRA_MB = 32
+
+
+def peak_rss_mb():
+    """Peak RSS of this process in MB (ru_maxrss is in kB on Linux and in bytes on macOS)."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 ** 2 if sys.platform == "darwin" else maxrss / 1024
+
+
+def child(n_features):
+    """Trains one model and prints the RSS once X is in memory and the peak RSS after train."""
+    import numpy as np
+    from cimcb_lite.model import PLS_SIMPLS
+
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(N_SAMPLES, n_features))
+    Y = rng.randint(0, 2, N_SAMPLES)
+    rss_data = peak_rss_mb()
+    PLS_SIMPLS(n_components=N_COMPONENTS, solver="simpls").train(X, Y)
+    print(rss_data, peak_rss_mb())
+
+
+def main():
+    failed = []
+    print("{:>10} {:>10} {:>12} {:>12} {:>10}".format("features", "X (MB)", "train (MB)", "budget (MB)", ""))
+    for n_features in N_FEATURES:
+        out = subprocess.run([sys.executable, __file__, "--child", str(n_features)], check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        rss_data, rss_peak = [float(i) for i in out.split()[-2:]]
+        size_x = N_SAMPLES * n_features * 8 / 1024 ** 2
+        budget = BUDGET_X_COPIES * size_x + BUDGET_EXTRA_MB
+        used = rss_peak - rss_data
+        ok = used <= budget
+        if not ok:
+            failed.append(n_features)
+        print("{:>10} {:>10.1f} {:>12.1f} {:>12.1f} {:>10}".format(n_features, size_x, used, budget, "ok" if ok else "OVER"))
+    assert len(failed) == 0, "train exceeded the memory budget for {} features".format(failed)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(int(sys.argv[2]))
+    else:
+        main()
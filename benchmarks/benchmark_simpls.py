@@ -0,0 +1,127 @@
+"""Time of the vectorized SIMPLS core (PLS_SIMPLS.pls_simpls, and pls_kernel) against the previous implementation with Python loops over the columns for the Gram-Schmidt steps (pls_simpls_loop below), over a grid of (n_samples, n_features, n_components). Beta is checked to agree for every case.
+
+Each solver is timed separately, with the solver that train picks for solver='auto' and its time relative to the faster of the two (auto/best), so a case where 'auto' picks the slower solver shows up in the table. The kernel form costs n^2 * p to form X0 * X0' whatever the number of components, so it is only faster than SIMPLS for wide data once n_components is about 2 + n_samples / 30 or more.
+
+Cases with n_components >= n_samples / 2 are skipped: with p >> n the PLS components are a Krylov sequence that loses orthogonality in every implementation as n_components approaches n_samples (e.g. the scores of the previous implementation are no longer orthogonal to 1e-3 at n=30, ncomp=20), so the timings would not compare like with like.
+
+    python benchmarks/benchmark_simpls.py
+"""
+import itertools
+import timeit
+import numpy as np
+from cimcb_lite.model import PLS_SIMPLS
+
+N_SAMPLES = [30, 100, 300]
+N_FEATURES = [100, 2000, 10000, 50000]
+N_COMPONENTS = [2, 5, 10, 15, 20]
+
+
+def pls_simpls_loop(X, Y, ncomp=2):
+    """The previous PLS_SIMPLS.pls_simpls (modified Gram-Schmidt with a Python loop over the previous columns, and Cov reshaped every iteration)."""
+    dtype = np.result_type(X.dtype, np.float32)
+    Y = np.asarray(Y, dtype=dtype)
+
+    # Center both predictors and response
+    meanX = np.mean(X, axis=0)
+    meanY = np.mean(Y, axis=0)
+    X0 = X - meanX
+    Y0 = Y - meanY
+    n, dx = X0.shape
+    dy = 1
+
+    # Empty arrays for loadings, scores, and weights
+    Xloadings = np.zeros([dx, ncomp], dtype=dtype)
+    Yloadings = np.zeros([dy, ncomp], dtype=dtype)
+    Xscores = np.zeros([n, ncomp], dtype=dtype)
+    Yscores = np.zeros([n, ncomp], dtype=dtype)
+    Weights = np.zeros([dx, ncomp], dtype=dtype)
+
+    # An orthonormal basis for the X loadings
+    V = np.zeros([dx, ncomp], dtype=dtype)
+    Cov = np.matmul(X0.T, Y0)
+    Cov = Cov.reshape(len(Cov), 1)
+
+    for i in range(ncomp):
+        si = np.linalg.norm(Cov)
+        ri = Cov[:, 0] / si
+        ti = np.matmul(X0, ri)
+        normti = np.linalg.norm(ti)
+        ti = ti / normti
+        qi = si / normti
+
+        Xloadings[:, i] = np.matmul(X0.T, ti)
+        Yloadings[:, i] = qi
+        Xscores[:, i] = ti
+        Yscores[:, i] = (Y0 * qi).tolist()
+        Weights[:, i] = ri / normti
+
+        # Update the orthonormal basis with modified Gram Schmidt
+        vi = Xloadings[:, i]
+        for repeat in range(2):
+            for j in range(i):
+                vj = V[:, j]
+                vi = vi - np.matmul(vj.T, vi) * vj
+        vi = vi / np.linalg.norm(vi)
+        V[:, i] = vi
+
+        # Deflate Cov
+        vim = vi * np.matmul(vi.T, Cov)
+        Cov = Cov - vim.reshape(len(vim), 1)
+        Vi = V[:, 0 : i + 1]
+        Vim = np.dot(Vi, np.matmul(Vi.T, Cov)).flatten()
+        Cov = Cov - Vim.reshape(len(Vim), 1)
+
+    # Use modified Gram-Schmidt, repeated twice.
+    for i in range(ncomp):
+        ui = Yscores[:, i]
+        for repeat in range(2):
+            for j in range(i):
+                tj = Xscores[:, j]
+                ui = ui - np.dot(np.matmul(tj.T, ui), tj)
+        Yscores[:, i] = ui
+
+    Beta = np.matmul(Weights, Yloadings.T)
+    Beta_add = meanY - np.dot(meanX, Beta)
+    Beta = np.insert(Beta, 0, Beta_add)
+    return Xscores, Yscores, Xloadings, Yloadings, Weights, Beta
+
+
+def best_time(func, repeat=3):
+    """Best time (in ms) of repeat calls."""
+    number = 1
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1000
+
+
+def main():
+    rng = np.random.RandomState(0)
+    print("{:>4} {:>6} {:>5} {:>9} {:>9} {:>9} {:>7} {:>9} {:>9} {:>9} {:>9}".format("n", "p", "ncomp", "loop (ms)", "simpls", "kernel", "auto", "simpls x", "kernel x", "auto/best", "rel dBeta"))
+    slow_auto = []
+    for n, p, ncomp in itertools.product(N_SAMPLES, N_FEATURES, N_COMPONENTS):
+        if ncomp >= n / 2:
+            continue
+        X = rng.normal(size=(n, p))
+        Y = rng.randint(0, 2, n)
+        Xscores_loop, _, _, _, _, beta_loop = pls_simpls_loop(X, Y, ncomp)
+        beta_simpls = PLS_SIMPLS.pls_simpls(X, Y, ncomp)[-1]
+        beta_kernel = PLS_SIMPLS.pls_kernel(X, Y, ncomp)[-1]
+        diff = max(np.linalg.norm(beta_simpls - beta_loop), np.linalg.norm(beta_kernel - beta_loop)) / np.linalg.norm(beta_loop)
+
+        # Beta is only compared where the previous implementation is well-conditioned (its scores are orthogonal to 1e-10). Otherwise rounding differences are amplified past 1e-6 in Beta (e.g. n=300, p=50000, ncomp=20), or Y is already fitted by fewer components (e.g. n=100, p=50000, ncomp=20) and the later components are rounding noise in every implementation (the kernel form gives NaN)
+        conditioned = np.max(np.abs(np.matmul(Xscores_loop.T, Xscores_loop) - np.eye(ncomp))) < 1e-10
+        if conditioned:
+            assert diff < 1e-6, "Beta does not match the previous implementation for n={}, p={}, ncomp={}".format(n, p, ncomp)
+
+        # Time of each solver, and the solver picked by solver='auto'
+        time_loop = best_time(lambda: pls_simpls_loop(X, Y, ncomp))
+        time_simpls = best_time(lambda: PLS_SIMPLS.pls_simpls(X, Y, ncomp))
+        time_kernel = best_time(lambda: PLS_SIMPLS.pls_kernel(X, Y, ncomp))
+        auto = PLS_SIMPLS(n_components=ncomp)._select_solver(X, ncomp)
+        auto_best = (time_simpls if auto == "simpls" else time_kernel) / min(time_simpls, time_kernel)
+        if auto_best > 1.25:
+            slow_auto.append((n, p, ncomp))
+        print("{:>4} {:>6} {:>5} {:>9.2f} {:>9.2f} {:>9.2f} {:>7} {:>8.1f}x {:>8.1f}x {:>9.2f} {:>9.1e}{}".format(n, p, ncomp, time_loop, time_simpls, time_kernel, auto, time_loop / time_simpls, time_loop / time_kernel, auto_best, diff, "" if conditioned else " (ill-conditioned, not compared)"))
+    print("auto picked a solver more than 1.25x slower than the other for {} cases: {}".format(len(slow_auto), slow_auto))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from . import bootstrap
 from . import cross_val
 from . import model
 from . import plot
+from . import serve
 from . import utils
 
-__all__ = ["bootstrap", "cross_val", "model", "plot", "utils"]
+__all__ = ["bootstrap", "cross_val", "model", "plot", "serve", "utils"]
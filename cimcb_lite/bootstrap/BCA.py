@@ -1,8 +1,7 @@
 import numpy as np
 import warnings
-from tqdm import tqdm
 from scipy.stats import norm
-from .BaseBootstrap import BaseBootstrap
+from .BaseBootstrap import BaseBootstrap, percentile_ci
 from ..utils import nested_getattr
 
 
@@ -14,11 +13,11 @@ class BCA(BaseBootstrap):
     model : object
         This object is assumed to store bootlist attributes in .model (e.g. modelPLS.model.x_scores_).
 
-    X : array-like, shape = [n_samples, n_features]
-        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+    X : array-like or Dataset, shape = [n_samples, n_features]
+        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors. If X is a Dataset, Y is taken from it and the model is trained on Dataset resamples (skipping the per-call checks).
 
     Y : array-like, shape = [n_samples, 1]
-        Response variables, where n_samples is the number of samples.
+        Response variables, where n_samples is the number of samples (ignored if X is a Dataset).
 
     bootlist : array-like, shape = [n_bootlist, 1]
         List of attributes to calculate and return bootstrap confidence intervals.
@@ -29,6 +28,15 @@ class BCA(BaseBootstrap):
     seed: integer or None (default None)
         Used to seed the generator for the resample with replacement.
 
+    weights: None, 'multinomial' or 'bayesian', (default None)
+        If None, each resample is a copy of the resampled rows. If 'multinomial', the model is trained on the original X with the count of each sample in the resample as sample_weight (the same resamples, without copying rows). If 'bayesian', Dirichlet weights are used (Bayesian bootstrap). model.train needs to accept sample_weight.
+
+    oob: boolean, (default False)
+        If True, each resample's model also scores the samples left out of the resample. The out-of-bag Y predicted value (ypred_oob) and binary_metrics (oob_stats) are stored after run().
+
+    n_jobs: None, -1 or a positive integer, (default None)
+        Number of worker processes used to fit the resamples (and the jackknife resamples). X is shared with the workers (not pickled for each resample). None or 1 fits them one after another, and -1 uses every CPU. The results are identical for any n_jobs.
+
     Returns
     -------
     bootci : dict of arrays
@@ -36,8 +44,8 @@ class BCA(BaseBootstrap):
         Each array contains 95% confidence intervals.
     """
 
-    def __init__(self, model, X, Y, bootlist, bootnum=100, seed=None):
-        super().__init__(model=model, X=X, Y=Y, bootlist=bootlist, bootnum=bootnum, seed=seed)
+    def __init__(self, model, X, Y, bootlist, bootnum=100, seed=None, weights=None, oob=False, n_jobs=None):
+        super().__init__(model=model, X=X, Y=Y, bootlist=bootlist, bootnum=bootnum, seed=seed, weights=weights, oob=oob, n_jobs=n_jobs)
         self.stat = {}
         self.jackidx = []
         self.jackstat = {}
@@ -46,7 +54,7 @@ class BCA(BaseBootstrap):
         """Stores selected attributes (from self.bootlist) for the original model."""
         self.stat = {}
         for i in self.bootlist:
-            self.stat[i] = nested_getattr(self.model, i)
+            self.stat[i] = nested_getattr(self.stat_model, i)
 
     def calc_jackidx(self):
         """Generate indices for every resampled (using jackknife technique) dataset."""
@@ -61,12 +69,21 @@ class BCA(BaseBootstrap):
         self.jackstat = {}
         for i in self.bootlist:
             self.jackstat[i] = []
-        for i in tqdm(self.jackidx, desc="Jackknife Resample"):
-            X_res = self.X[i, :]
-            Y_res = self.Y[i]
-            self.model.train(X_res, Y_res)
+        weighted = self.weights is not None
+        if weighted:
+            # Leave a sample out by giving it a weight of 0 (no rows are copied)
+            resamples = (self.calc_jackweight(i) for i in self.jackidx)
+        else:
+            resamples = self.jackidx
+        for stat, bag, ypred_oob in self.fit_resamples(resamples, len(self.jackidx), weighted, score=False, desc="Jackknife Resample"):
             for i in self.bootlist:
-                self.jackstat[i].append(nested_getattr(self.model, i))
+                self.jackstat[i].append(stat[i])
+
+    def calc_jackweight(self, jackidx):
+        """Sample weights for a jackknife resample (1 for the samples in jackidx, 0 for the sample left out)."""
+        jackweight = np.zeros(len(self.Y))
+        jackweight[jackidx] = 1
+        return jackweight
 
     def calc_bootidx(self):
         super().calc_bootidx()
@@ -90,61 +107,33 @@ class BCA(BaseBootstrap):
 
     @staticmethod
     def bootci_method(bootstat, stat, jackstat):
-        """Calculates bootstrap confidence intervals using the bias-corrected and accelerated bootstrap interval."""
-        if stat.ndim == 1:
-            nboot = len(bootstat)
-            zalpha = norm.ppf(0.05 / 2)
-            obs = stat  # Observed mean
-            meansum = np.zeros((1, len(obs))).flatten()
-            for i in range(len(obs)):
-                for j in range(len(bootstat)):
-                    if bootstat[j][i] >= obs[i]:
-                        meansum[i] = meansum[i] + 1
-            prop = meansum / nboot  # Proportion of times boot mean > obs mean
-            z0 = -norm.ppf(prop, loc=0, scale=1)
-
-            # new alpha
-            jmean = np.mean(jackstat, axis=0)
-            num = np.sum((jmean - jackstat) ** 3, axis=0)
-            den = np.sum((jmean - jackstat) ** 2, axis=0)
-            ahat = num / (6 * den ** (3 / 2))
-
-            # Ignore warnings as they are delt with at line 123 with try/except
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                zL = z0 + norm.ppf(0.05 / 2, loc=0, scale=1)
-                pct1 = 100 * norm.cdf((z0 + zL / (1 - ahat * zL)))
-                zU = z0 + norm.ppf((1 - 0.05 / 2), loc=0, scale=1)
-                pct2 = 100 * norm.cdf((z0 + zU / (1 - ahat * zU)))
-
-            boot_ci = []
-            for i in range(len(pct1)):
-                bootstat_i = [item[i] for item in bootstat]
-                try:
-                    append_low = np.percentile(bootstat_i, pct1[i])
-                    append_upp = np.percentile(bootstat_i, pct2[i])
-                except ValueError:
-                    # USE BC if BCA is not possible
-                    pct1 = 100 * norm.cdf((2 * z0 + zalpha))
-                    pct2 = 100 * norm.cdf((2 * z0 - zalpha))
-                    append_low = np.percentile(bootstat_i, pct1[i])
-                    append_upp = np.percentile(bootstat_i, pct2[i])
-                boot_ci.append([append_low, append_upp])
-            boot_ci = np.array(boot_ci)
-
-        # Recursive component (to get ndim = 1, and append)
-        else:
-            ncomp = stat.shape[1]
-            boot_ci = []
-            for k in range(ncomp):
-                var = []
-                var_jstat = []
-                for j in range(len(bootstat)):
-                    var.append(bootstat[j][:, k])
-                for m in range(len(jackstat)):
-                    var_jstat.append(jackstat[m][:, k])
-                var_boot = BCA.bootci_method(var, stat[:, k], var_jstat)
-                boot_ci.append(var_boot)
-            boot_ci = np.array(boot_ci)
-
-        return boot_ci
+        """Calculates bootstrap confidence intervals using the bias-corrected and accelerated bootstrap interval (for every feature and component at once, on the stacked bootstat and jackstat)."""
+        bootstat = np.asarray(bootstat)
+        jackstat = np.asarray(jackstat)
+        nboot = len(bootstat)
+        zalpha = norm.ppf(0.05 / 2)
+        obs = stat  # Observed mean
+        prop = np.sum(bootstat >= obs, axis=0) / nboot  # Proportion of times boot mean > obs mean
+        z0 = -norm.ppf(prop, loc=0, scale=1)
+
+        # new alpha
+        jmean = np.mean(jackstat, axis=0)
+        num = np.sum((jmean - jackstat) ** 3, axis=0)
+        den = np.sum((jmean - jackstat) ** 2, axis=0)
+        ahat = num / (6 * den ** (3 / 2))
+
+        # Ignore warnings as they are delt with below (BC is used where BCA is not possible)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            zL = z0 + norm.ppf(0.05 / 2, loc=0, scale=1)
+            pct1 = 100 * norm.cdf((z0 + zL / (1 - ahat * zL)))
+            zU = z0 + norm.ppf((1 - 0.05 / 2), loc=0, scale=1)
+            pct2 = 100 * norm.cdf((z0 + zU / (1 - ahat * zU)))
+
+        # USE BC if BCA is not possible (a BCA percentile is NaN or outside [0, 100]). As in the loop over features, BC is used for the first such feature and every feature after it (separately for each component)
+        bca_valid = (pct1 >= 0) & (pct1 <= 100) & (pct2 >= 0) & (pct2 <= 100)
+        if not np.all(bca_valid):
+            use_bc = np.logical_or.accumulate(~bca_valid, axis=0)
+            pct1 = np.where(use_bc, 100 * norm.cdf((2 * z0 + zalpha)), pct1)
+            pct2 = np.where(use_bc, 100 * norm.cdf((2 * z0 - zalpha)), pct2)
+        return percentile_ci(bootstat, pct1, pct2)
@@ -1,32 +1,63 @@
+import mmap
+import os
 import numpy as np
 from tqdm import tqdm
 from abc import ABC, abstractmethod
-from copy import deepcopy
-from ..utils import nested_getattr
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy, deepcopy
+from itertools import islice
+from ..utils import nested_getattr, Dataset, binary_metrics
 
 
 class BaseBootstrap(ABC):
     """Base class for bootstrap: BC, BCA, and Perc."""
 
     @abstractmethod
-    def __init__(self, model, X, Y, bootlist, bootnum=100, seed=None):
-        self.model = deepcopy(model)  # Make a copy of the model
+    def __init__(self, model, X, Y, bootlist, bootnum=100, seed=None, weights=None, oob=False, n_jobs=None):
+        if weights not in [None, "multinomial", "bayesian"]:
+            raise ValueError("weights has to be either None, 'multinomial' or 'bayesian'.")
+        if oob is True and weights == "bayesian":
+            raise ValueError("oob can't be used with Bayesian bootstrap weights (every sample is in every resample).")
+        if n_jobs is not None and (n_jobs == 0 or n_jobs < -1):
+            raise ValueError("n_jobs has to be None, -1 or a positive integer.")
+        self.stat_model = model  # The fitted model (used for the original stat)
+        self.model = model.clone() if hasattr(model, "clone") else deepcopy(model)  # An untrained copy of the model to fit to each resample
+        # A Dataset is validated once, and its resamples are passed to train (which then skips the checks)
+        self.dataset = None
+        if isinstance(X, Dataset):
+            self.dataset = X
+            X = X.X
+            Y = self.dataset.Y
         self.X = X
         self.Y = Y
         self.bootlist = bootlist
         self.bootnum = bootnum
         self.seed = seed
+        self.weights = weights
+        self.oob = oob
+        self.n_jobs = n_jobs
         self.bootidx = []
+        self.bootweight = []
         self.bootstat = {}
         self.bootci = {}
+        self.bagattr = getattr(model, "bagattr", None)  # attribute (e.g. Beta) kept for every resample, for bagged predictions
+        self.bootbag = []
 
     def calc_bootidx(self):
-        """Generate indices for every resampled (with replacement) dataset."""
+        """Generate indices for every resampled (with replacement) dataset, and the sample weights if weights is 'multinomial' (the count of each sample in the resample) or 'bayesian' (Dirichlet weights, scaled to sum to n_samples)."""
         np.random.seed(self.seed)
         self.bootidx = []
+        self.bootweight = []
         for i in range(self.bootnum):
-            bootidx_i = np.random.choice(len(self.Y), len(self.Y))
-            self.bootidx.append(bootidx_i)
+            if self.weights == "bayesian":
+                bootweight_i = np.random.dirichlet(np.ones(len(self.Y))) * len(self.Y)
+                self.bootweight.append(bootweight_i)
+            else:
+                bootidx_i = np.random.choice(len(self.Y), len(self.Y))
+                self.bootidx.append(bootidx_i)
+                if self.weights == "multinomial":
+                    self.bootweight.append(np.bincount(bootidx_i, minlength=len(self.Y)))
 
     def calc_bootstat(self):
         """Trains and test model, then stores selected attributes (from self.bootlist) for each resampled dataset."""
@@ -34,14 +65,43 @@ class BaseBootstrap(ABC):
         self.bootstat = {}
         for i in self.bootlist:
             self.bootstat[i] = []
-        # Calculate bootstat for each bootstrap resample
-        for i in tqdm(self.bootidx, desc="Bootstrap Resample"):
-            X_res = self.X[i, :]
-            Y_res = self.Y[i]
-            self.model.train(X_res, Y_res)
-            self.model.test(X_res)
+        self.bootbag = []
+        self.oob_sum = np.zeros(len(self.Y))
+        self.oob_count = np.zeros(len(self.Y), dtype=int)
+        # Calculate bootstat for each set of bootstrap weights (the model is trained on the original X, so no rows are copied), or for each bootstrap resample
+        weighted = self.weights is not None
+        resamples = self.bootweight if weighted else self.bootidx
+        results = self.fit_resamples(resamples, len(resamples), weighted, score=True, desc="Bootstrap Resample")
+        for resample, (stat, bag, ypred_oob) in zip(resamples, results):
             for j in self.bootlist:
-                self.bootstat[j].append(nested_getattr(self.model, j))
+                self.bootstat[j].append(stat[j])
+            if bag is not None:
+                self.bootbag.append(bag)
+            if ypred_oob is not None:
+                oob_mask = calc_oob_mask(resample, len(self.Y), weighted)
+                self.oob_sum[oob_mask] += ypred_oob
+                self.oob_count[oob_mask] += 1
+        self.calc_oob()
+
+    def fit_resamples(self, resamples, total, weighted, score=True, desc="Bootstrap Resample"):
+        """Yields (stat, bag, ypred_oob) for each resample (row indices, or sample weights if weighted), in order (see fit_resample). If n_jobs > 1, chunks of resamples are fitted in worker processes that share X (see ParallelResamples), so the results are identical to the serial loop."""
+        args = (weighted, self.bootlist, self.bagattr if score else None, self.oob and score, score)
+        if self.n_jobs is None or self.n_jobs == 1:
+            for resample in tqdm(resamples, total=total, desc=desc):
+                yield fit_resample(self.model, self.X, self.Y, self.dataset, resample, *args)
+            return
+        with ParallelResamples(self.model, self.X, self.Y, self.dataset, self.n_jobs) as pool:
+            for result in pool.map(resamples, total, args, desc=desc):
+                yield result
+
+    def calc_oob(self):
+        """Calculates the out-of-bag Y predicted value for each sample (the mean score of the models whose resample left it out, NaN if it was never left out) and the out-of-bag binary_metrics."""
+        if self.oob is not True:
+            return
+        with np.errstate(invalid="ignore"):
+            self.ypred_oob = self.oob_sum / self.oob_count
+        valid = self.oob_count > 0
+        self.oob_stats = binary_metrics(np.asarray(self.Y)[valid], self.ypred_oob[valid])
 
     @abstractmethod
     def calc_bootci(self):
@@ -57,3 +117,156 @@ class BaseBootstrap(ABC):
     def bootci_method(self):
         """Method used to calculate boostrap confidence intervals (Refer to: BC, BCA, or Perc)."""
         pass
+
+
+def percentile_ci(bootstat, pct1, pct2):
+    """Returns the [pct1, pct2] percentile interval (linear interpolation, as np.percentile) of every feature of the stacked bootstat (shape = [n_boot, n_features, ...]), sorting bootstat once. pct1 and pct2 are a number or one percentile for each feature (shape = bootstat.shape[1:]). The intervals are returned as n_features x 2 for 1-D stats, and n_components x n_features x 2 for 2-D stats."""
+    bootsort = np.sort(bootstat, axis=0)
+    nboot = len(bootsort)
+    pct = np.array([np.broadcast_to(pct1, bootsort.shape[1:]), np.broadcast_to(pct2, bootsort.shape[1:])], dtype=float)
+    if not ((pct >= 0) & (pct <= 100)).all():
+        raise ValueError("Percentiles must be in the range [0, 100]")
+
+    # Linear interpolation between the neighbouring order statistics of each feature
+    virtual_idx = (nboot - 1) * (pct / 100)
+    previous_idx = np.floor(virtual_idx)
+    gamma = virtual_idx - previous_idx
+    previous_idx = previous_idx.astype(np.intp)
+    next_idx = np.minimum(previous_idx + 1, nboot - 1)
+    previous = np.take_along_axis(bootsort, previous_idx, axis=0)
+    next = np.take_along_axis(bootsort, next_idx, axis=0)
+    diff = next - previous
+    ci = previous + diff * gamma
+    upper = gamma >= 0.5
+    ci[upper] = next[upper] - (diff * (1 - gamma))[upper]
+
+    # np.percentile returns NaN for a feature with NaNs (sorted to the end)
+    ci[:, np.isnan(bootsort[-1])] = np.nan
+
+    # 2 x n_features [x n_components] -> [n_components x] n_features x 2 (float32 stats stay float32)
+    ci = ci.astype(np.result_type(bootsort.dtype, np.float16), copy=False)
+    return np.moveaxis(np.moveaxis(ci, 0, -1), 0, -2)
+
+
+def fit_resample(model, X, Y, dataset, resample, weighted, bootlist, bagattr=None, oob=False, score=True):
+    """Trains model on one resample (the rows in resample, or the original X with resample as sample_weight if weighted), and returns the bootlist attributes (a dict), bagattr (or None) and the Y predicted value of the out-of-bag samples (or None)."""
+    # The weighted model is trained on the original X, so only the out-of-bag rows are scored (below)
+    if weighted:
+        if dataset is not None:
+            model.train(dataset, sample_weight=resample)
+        else:
+            model.train(X, Y, sample_weight=resample)
+    elif dataset is not None:
+        data_res = dataset.take(resample)
+        model.train(data_res)
+        if score:
+            model.test(data_res.X)
+    else:
+        X_res = X[resample, :]
+        Y_res = Y[resample]
+        model.train(X_res, Y_res)
+        if score:
+            model.test(X_res)
+    stat = {}
+    for j in bootlist:
+        stat[j] = nested_getattr(model, j)
+    bag = nested_getattr(model, bagattr) if bagattr is not None else None
+    ypred_oob = None
+    if oob is True:
+        oob_mask = calc_oob_mask(resample, len(Y), weighted)
+        if oob_mask.any():
+            ypred_oob = np.ravel(model.test(X[oob_mask]))
+    return stat, bag, ypred_oob
+
+
+def calc_oob_mask(resample, n, weighted):
+    """Returns the mask of the samples left out of a resample (row indices, or sample weights if weighted)."""
+    if weighted:
+        return resample == 0
+    oob_mask = np.ones(n, dtype=bool)
+    oob_mask[resample] = False
+    return oob_mask
+
+
+class ParallelResamples(object):
+    """Process pool for fit_resample. X is copied once into shared memory (an np.memmap is re-opened from its file instead), and each worker attaches to it and receives the untrained model, Y and Dataset (without X) once when it starts. Only the resamples and results are pickled for each task, and results are returned in order."""
+
+    def __init__(self, model, X, Y, dataset, n_jobs):
+        from multiprocessing.shared_memory import SharedMemory
+
+        self.n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self.shm = None
+        # Only a numpy array or np.memmap can be shared with the workers (check before reading X.flags, as e.g. scipy.sparse X has none)
+        if not isinstance(X, np.ndarray):
+            raise ValueError("n_jobs needs X to be a numpy array or np.memmap (use n_jobs=None for scipy.sparse X).")
+        order = "F" if X.flags.f_contiguous and not X.flags.c_contiguous else "C"
+        if isinstance(X, np.memmap) and isinstance(X.base, mmap.mmap):
+            source = ("memmap", X.filename, X.dtype.str, X.shape, X.offset, order)
+        else:
+            self.shm = SharedMemory(create=True, size=max(X.nbytes, 1))
+            X_shared = np.ndarray(X.shape, dtype=X.dtype, buffer=self.shm.buf, order=order)
+            X_shared[...] = X
+            del X_shared
+            source = ("shm", self.shm.name, X.dtype.str, X.shape, 0, order)
+        if dataset is not None:
+            dataset = copy(dataset)
+            dataset.X = None
+        self.executor = ProcessPoolExecutor(max_workers=self.n_jobs, initializer=init_worker, initargs=(model, source, np.asarray(Y), dataset))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.executor.shutdown()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def map(self, resamples, total, args, desc="Bootstrap Resample"):
+        """Yields the result of fit_resample for each resample (in order). Resamples are sent in chunks, with at most 2 chunks per worker in flight."""
+        chunksize = max(1, total // (4 * self.n_jobs))
+        resamples = iter(resamples)
+        pending = deque()
+        with tqdm(total=total, desc=desc) as pbar:
+            while True:
+                while len(pending) < 2 * self.n_jobs:
+                    chunk = list(islice(resamples, chunksize))
+                    if len(chunk) == 0:
+                        break
+                    pending.append(self.executor.submit(fit_chunk, chunk, args))
+                if len(pending) == 0:
+                    return
+                results = pending.popleft().result()
+                pbar.update(len(results))
+                for result in results:
+                    yield result
+
+
+_worker = {}  # model, X, Y and Dataset of a ParallelResamples worker process
+
+
+def init_worker(model, source, Y, dataset):
+    """Attaches a ParallelResamples worker to X, and stores the untrained model, Y and Dataset."""
+    if source[0] == "memmap":
+        kind, filename, dtype, shape, offset, order = source
+        X = np.memmap(filename, dtype=np.dtype(dtype), mode="r", offset=offset, shape=shape, order=order)
+    else:
+        from multiprocessing.shared_memory import SharedMemory
+
+        kind, name, dtype, shape, offset, order = source
+        # Workers share the resource tracker of the parent process, which unlinks the shared memory
+        shm = SharedMemory(name=name)
+        _worker["shm"] = shm
+        X = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, order=order)
+    if dataset is not None:
+        dataset.X = X
+    _worker["model"] = model
+    _worker["X"] = X
+    _worker["Y"] = Y
+    _worker["dataset"] = dataset
+
+
+def fit_chunk(chunk, args):
+    """Runs fit_resample for each resample in chunk (in a ParallelResamples worker)."""
+    return [fit_resample(_worker["model"], _worker["X"], _worker["Y"], _worker["dataset"], resample, *args) for resample in chunk]
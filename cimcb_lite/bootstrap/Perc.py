@@ -1,5 +1,5 @@
 import numpy as np
-from .BaseBootstrap import BaseBootstrap
+from .BaseBootstrap import BaseBootstrap, percentile_ci
 from ..utils import nested_getattr
 
 
@@ -11,11 +11,11 @@ class Perc(BaseBootstrap):
     model : object
         This object is assumed to store bootlist attributes in .model (e.g. modelPLS.model.x_scores_).
 
-    X : array-like, shape = [n_samples, n_features]
-        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+    X : array-like or Dataset, shape = [n_samples, n_features]
+        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors. If X is a Dataset, Y is taken from it and the model is trained on Dataset resamples (skipping the per-call checks).
 
     Y : array-like, shape = [n_samples, 1]
-        Response variables, where n_samples is the number of samples.
+        Response variables, where n_samples is the number of samples (ignored if X is a Dataset).
 
     bootlist : array-like, shape = [n_bootlist, 1]
         List of attributes to calculate and return bootstrap confidence intervals.
@@ -26,6 +26,15 @@ class Perc(BaseBootstrap):
     seed: integer or None (default None)
         Used to seed the generator for the resample with replacement.
 
+    weights: None, 'multinomial' or 'bayesian', (default None)
+        If None, each resample is a copy of the resampled rows. If 'multinomial', the model is trained on the original X with the count of each sample in the resample as sample_weight (the same resamples, without copying rows). If 'bayesian', Dirichlet weights are used (Bayesian bootstrap). model.train needs to accept sample_weight.
+
+    oob: boolean, (default False)
+        If True, each resample's model also scores the samples left out of the resample. The out-of-bag Y predicted value (ypred_oob) and binary_metrics (oob_stats) are stored after run().
+
+    n_jobs: None, -1 or a positive integer, (default None)
+        Number of worker processes used to fit the resamples. X is shared with the workers (not pickled for each resample). None or 1 fits them one after another, and -1 uses every CPU. The results are identical for any n_jobs.
+
     Returns
     -------
     bootci : dict of arrays
@@ -34,14 +43,14 @@ class Perc(BaseBootstrap):
         To return bootci, initalise then use method run().
     """
 
-    def __init__(self, model, X, Y, bootlist, bootnum=100, seed=None):
-        super().__init__(model=model, X=X, Y=Y, bootlist=bootlist, bootnum=bootnum, seed=seed)
+    def __init__(self, model, X, Y, bootlist, bootnum=100, seed=None, weights=None, oob=False, n_jobs=None):
+        super().__init__(model=model, X=X, Y=Y, bootlist=bootlist, bootnum=bootnum, seed=seed, weights=weights, oob=oob, n_jobs=n_jobs)
 
     def calc_stat(self):
         """Stores selected attributes (from self.bootlist) for the original model."""
         self.stat = {}
         for i in self.bootlist:
-            self.stat[i] = nested_getattr(self.model, i)
+            self.stat[i] = nested_getattr(self.stat_model, i)
 
     def calc_bootidx(self):
         super().calc_bootidx()
@@ -63,26 +72,5 @@ class Perc(BaseBootstrap):
 
     @staticmethod
     def bootci_method(bootstat, stat):
-        """Calculates bootstrap confidence intervals using the percentile bootstrap interval."""
-        if bootstat[0].ndim == 1:
-            boot_ci = []
-            # Calculate bootci for each component (peak), and append it to bootci
-            for i in range(len(bootstat[0])):
-                bootstat_i = [item[i] for item in bootstat]
-                lower_ci = np.percentile(bootstat_i, 2.5)
-                upper_ci = np.percentile(bootstat_i, 97.5)
-                boot_ci.append([lower_ci, upper_ci])
-            boot_ci = np.array(boot_ci)
-
-        # Recursive component (to get ndim = 1, and append)
-        else:
-            ncomp = stat.shape[1]
-            boot_ci = []
-            for k in range(ncomp):
-                bootstat_k = []
-                for j in range(len(bootstat)):
-                    bootstat_k.append(bootstat[j][:, k])
-                boot_ci_k = Perc.bootci_method(bootstat_k, stat[:, k])
-                boot_ci.append(boot_ci_k)
-            boot_ci = np.array(boot_ci)
-        return boot_ci
+        """Calculates bootstrap confidence intervals using the percentile bootstrap interval (for every feature and component at once, on the stacked bootstat)."""
+        return percentile_ci(np.asarray(bootstat), 2.5, 97.5)
@@ -1,6 +1,8 @@
 import numpy as np
+import scipy.sparse
 from abc import ABC, abstractmethod
 from sklearn.model_selection import ParameterGrid
+from ..utils import Dataset
 
 class BaseCrossVal(ABC):
     """Base class for crossval: kfold."""
@@ -8,6 +10,22 @@ class BaseCrossVal(ABC):
     @abstractmethod
     def __init__(self, model, X, Y, param_dict, folds=10, bootnum=100):
         self.model = model 
+        # A Dataset is validated once, and its subsets are passed to train (which then skips the checks)
+        self.dataset = None
+        if isinstance(X, Dataset):
+            self.dataset = X
+            X = X.X
+            Y = self.dataset.Y
+        # Error checks (once for every path, as the n_components path of kfold fits without train and its checks)
+        if self.dataset is not None:
+            self.dataset.check_binary()
+        else:
+            if X.shape[0] != len(Y):
+                raise ValueError("length of X does not match length of Y.")
+            if not np.isin(Y, [0, 1]).all() or len(np.unique(Y)) != 2:
+                raise ValueError("Y should only contain 0s and 1s (for 2 groups).")
+            if np.isnan(X.data if scipy.sparse.issparse(X) else X).any():
+                raise ValueError("NaNs found in X.")
         self.X = X
         self.Y = Y
         self.param_dict = param_dict
@@ -19,11 +19,11 @@ class kfold(BaseCrossVal):
     model : object
         This object is assumed to store bootlist attributes in .model (e.g. modelPLS.model.x_scores_).
 
-    X : array-like, shape = [n_samples, n_features]
-        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+    X : array-like or Dataset, shape = [n_samples, n_features]
+        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors. If X is a Dataset, Y is taken from it and the model is trained on Dataset resamples (skipping the per-call checks).
 
     Y : array-like, shape = [n_samples, 1]
-        Response variables, where n_samples is the number of samples.
+        Response variables, where n_samples is the number of samples (ignored if X is a Dataset).
 
     param_dict : dict
         List of attributes to calculate and return bootstrap confidence intervals.
@@ -47,6 +47,10 @@ class kfold(BaseCrossVal):
 
     def calc_ypred(self):
         """Calculates ypred full and ypred cv."""
+        # If only n_components varies, use one nested component path fit (instead of a fit for each n_components)
+        if self._use_path():
+            self.ypred_full, self.ypred_cv = self._calc_ypred_path(self.X, self.Y)
+            return
         self.ypred_full = []
         self.ypred_cv = []
         for params in self.param_list:
@@ -54,11 +58,14 @@ class kfold(BaseCrossVal):
             params_i = params
             model_i = self.model(**params_i)
             # Full
-            model_i.train(self.X, self.Y)
+            if self.dataset is not None:
+                model_i.train(self.dataset)
+            else:
+                model_i.train(self.X, self.Y)
             ypred_full_i = model_i.test(self.X)
             self.ypred_full.append(ypred_full_i)
             # CV (for each fold)
-            ypred_cv_i = self._calc_cv_ypred(model_i, self.X, self.Y)
+            ypred_cv_i = self._calc_cv_ypred(model_i, self.X, self.Y, dataset=self.dataset)
             self.ypred_cv.append(ypred_cv_i)
 
     def calc_stats(self):
@@ -94,19 +101,34 @@ class kfold(BaseCrossVal):
         self.ypred_cv_boot = []
         for i in tqdm(range(self.bootnum), desc="Kfold"):
             bootidx_i = np.random.choice(len(self.Y), len(self.Y))
-            newX = self.X[bootidx_i, :]
-            newY = self.Y[bootidx_i]
+            newdata = None
+            if self.dataset is not None:
+                newdata = self.dataset.take(bootidx_i)
+                newX = newdata.X
+                newY = newdata.Y
+            else:
+                newX = self.X[bootidx_i, :]
+                newY = self.Y[bootidx_i]
+            if self._use_path():
+                ypred_full_nboot_i, ypred_cv_nboot_i = self._calc_ypred_path(newX, newY)
+                self.ytrue_boot.append(newY)
+                self.ypred_full_boot.append(ypred_full_nboot_i)
+                self.ypred_cv_boot.append(ypred_cv_nboot_i)
+                continue
             ypred_full_nboot_i = []
             ypred_cv_nboot_i = []
             for params in self.param_list:
                 # Set hyper-parameters
                 model_i = self.model(**params)
                 # Full
-                model_i.train(newX, newY)
+                if newdata is not None:
+                    model_i.train(newdata)
+                else:
+                    model_i.train(newX, newY)
                 ypred_full_i = model_i.test(newX)
                 ypred_full_nboot_i.append(ypred_full_i)
                 # cv
-                ypred_cv_i = self._calc_cv_ypred(model_i, newX, newY)
+                ypred_cv_i = self._calc_cv_ypred(model_i, newX, newY, dataset=newdata)
                 ypred_cv_nboot_i.append(ypred_cv_i)
             self.ytrue_boot.append(newY)
             self.ypred_full_boot.append(ypred_full_nboot_i)
@@ -127,20 +149,57 @@ class kfold(BaseCrossVal):
             self.full_boot_metrics.append(stats_full_i)
             self.cv_boot_metrics.append(stats_cv_i)
 
-    def _calc_cv_ypred(self, model_i, X, Y):
-        """Method used to calculate ypred cv."""
+    def _calc_cv_ypred(self, model_i, X, Y, dataset=None):
+        """Method used to calculate ypred cv (if dataset is given, the model is trained on its subsets)."""
         ypred_cv_i = [None] * len(Y)
+        # Use the fold-aware fit (full data cross-products downdated for each fold) if the model supports it
+        if hasattr(model_i, "fit_folds"):
+            testidx = [test for train, test in self.crossval_idx.split(self.X, self.Y)]
+            beta_folds = model_i.fit_folds(X, Y, testidx)[:, :, -1]
+            for test, beta in zip(testidx, beta_folds):
+                ypred_cv_i_j = X[test, :] @ beta[1:] + beta[0]
+                for (idx, val) in zip(test, ypred_cv_i_j):
+                    ypred_cv_i[idx] = val.tolist()
+            return ypred_cv_i
         for train, test in self.crossval_idx.split(self.X, self.Y):
-            X_train = X[train, :]
-            Y_train = Y[train]
             X_test = X[test, :]
-            model_i.train(X_train, Y_train)
+            if dataset is not None:
+                model_i.train(dataset.take(train))
+            else:
+                X_train = X[train, :]
+                Y_train = Y[train]
+                model_i.train(X_train, Y_train)
             ypred_cv_i_j = model_i.test(X_test)
             # Return value to y_pred_cv in the correct position # Better way to do this
             for (idx, val) in zip(test, ypred_cv_i_j):
                 ypred_cv_i[idx] = val.tolist()
         return ypred_cv_i
 
+    def _use_path(self):
+        """Returns True if n_components is the only hyper-parameter and the model can fit a nested component path."""
+        return list(self.param_dict.keys()) == ["n_components"] and hasattr(self.model, "fit_path")
+
+    def _calc_ypred_path(self, X, Y):
+        """Method used to calculate ypred full and ypred cv for every n_components using one path fit (full data and each fold)."""
+        ncomps = [params["n_components"] for params in self.param_list]
+        col = [k - 1 for k in ncomps]
+        model_i = self.model(n_components=max(ncomps))
+        # Full
+        beta_path = model_i.fit_path(X, Y)[:, col]
+        ypred_full_path = X @ beta_path[1:] + beta_path[0]
+        ypred_full = [ypred_full_path[:, k] for k in range(len(col))]
+        # CV (for each fold)
+        testidx = [test for train, test in self.crossval_idx.split(self.X, self.Y)]
+        ypred_cv_path = np.zeros([len(Y), len(col)])
+        if hasattr(model_i, "fit_folds"):
+            beta_folds = model_i.fit_folds(X, Y, testidx)[:, :, col]
+        else:
+            beta_folds = [model_i.fit_path(np.delete(X, test, axis=0), np.delete(Y, test))[:, col] for test in testidx]
+        for test, beta_path in zip(testidx, beta_folds):
+            ypred_cv_path[test] = X[test, :] @ beta_path[1:] + beta_path[0]
+        ypred_cv = [ypred_cv_path[:, k].tolist() for k in range(len(col))]
+        return ypred_full, ypred_cv
+
     def _format_table(self, stats_list):
         """Make stats pretty (pandas table -> proper names in columns)."""
         table = pd.DataFrame(stats_list).T
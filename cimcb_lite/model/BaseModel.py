@@ -1,3 +1,4 @@
+import inspect
 from abc import ABC, abstractmethod, abstractproperty
 import numpy as np
 import pandas as pd
@@ -37,13 +38,30 @@ class BaseModel(ABC):
         """A list of attributes for bootstrap resampling."""
         pass
 
+    def get_params(self):
+        """Returns the hyper-parameters of the model (the arguments of __init__) as a dict."""
+        params = {}
+        for name in inspect.signature(type(self).__init__).parameters:
+            if name != "self":
+                params[name] = getattr(self, name)
+        return params
+
+    def clone(self):
+        """Returns a new, untrained model with the same hyper-parameters. Unlike deepcopy, the training data and fitted arrays are not copied."""
+        return type(self)(**self.get_params())
+
+    def _check_training_data(self):
+        """Error check that the training data was kept (needed to resample or permute it)."""
+        if getattr(self, "X", None) is None:
+            raise ValueError("The training data was not kept (retain_training_data=False). Use the bootstrap classes or permutation_test with X and Y instead.")
+
     def evaluate(self, testset=None, specificity=False, cutoffscore=False, bootnum=1000):
         """Plots a figure containing a Violin plot, Distribution plot, ROC plot and Binary Metrics statistics.
 
         Parameters
         ----------
-        testset : array-like, shape = [n_samples, 2] or None, (default None)
-            If testset is None, use train Y and train Y predicted for evaluate. Alternatively, testset is used to evaluate model in the format [Ytest, Ypred].
+        testset : array-like, shape = [n_samples, 2], 'oob' or None, (default None)
+            If testset is None, use train Y and train Y predicted for evaluate. Alternatively, testset is used to evaluate model in the format [Ytest, Ypred]. If testset is 'oob', the out-of-bag predictions from calc_bootci(oob=True) are used as the test set.
 
         specificity : number or False, (default False)
             Use the specificity to draw error bar. When False, use the cutoff score of 0.5.
@@ -57,6 +75,13 @@ class BaseModel(ABC):
         Ytrue_train = self.Y
         Yscore_train = self.Y_pred.flatten()
 
+        # Use the out-of-bag predictions (samples that were in every resample are left out)
+        if isinstance(testset, str) and testset == "oob":
+            if not hasattr(self, "Y_pred_oob"):
+                raise ValueError("Use method calc_bootci with oob=True prior to evaluate(testset='oob').")
+            valid = ~np.isnan(self.Y_pred_oob)
+            testset = [np.asarray(self.Y)[valid], self.Y_pred_oob[valid]]
+
         # Get Ytrue_test, Yscore_test from testset
         if testset is not None:
             Ytrue_test = np.array(testset[0])
@@ -66,7 +91,7 @@ class BaseModel(ABC):
             if len(Ytrue_test) != len(Yscore_test):
                 raise ValueError("evaluate can't be used as length of Ytrue does not match length of Yscore in test set.")
             if len(np.unique(Ytrue_test)) != 2:
-                raise ValueError("Ytrue_test needs to have 2 groups. There is {}".format(len(np.unique(Y))))
+                raise ValueError("Ytrue_test needs to have 2 groups. There is {}".format(len(np.unique(Ytrue_test))))
             if np.sort(np.unique(Ytrue_test))[0] != 0:
                 raise ValueError("Ytrue_test should only contain 0s and 1s.")
             if np.sort(np.unique(Ytrue_test))[1] != 1:
@@ -75,7 +100,7 @@ class BaseModel(ABC):
             # Get Yscore_combined and Ytrue_combined_name (Labeled Ytrue)
             Yscore_combined = np.concatenate([Yscore_train, Yscore_test])
             Ytrue_combined = np.concatenate([Ytrue_train, Ytrue_test + 2])  # Each Ytrue per group is unique
-            Ytrue_combined_name = Ytrue_combined.astype(np.str)
+            Ytrue_combined_name = Ytrue_combined.astype(str)
             Ytrue_combined_name[Ytrue_combined == 0] = "Train (0)"
             Ytrue_combined_name[Ytrue_combined == 1] = "Train (1)"
             Ytrue_combined_name[Ytrue_combined == 2] = "Test (0)"
@@ -189,7 +214,7 @@ class BaseModel(ABC):
         output_notebook()
         show(column(Div(text=title_bokeh, width=900, height=50), fig))
 
-    def calc_bootci(self, bootnum=100, type="bca"):
+    def calc_bootci(self, bootnum=100, type="bca", weights=None, oob=False, n_jobs=None):
         """Calculates bootstrap confidence intervals based on bootlist.
 
         Parameters
@@ -199,16 +224,37 @@ class BaseModel(ABC):
 
         type : 'bc', 'bca', 'perc', (default 'bca')
             Methods for bootstrap confidence intervals. 'bc' is bias-corrected bootstrap confidence intervals. 'bca' is bias-corrected and accelerated bootstrap confidence intervals. 'perc' is percentile confidence intervals.
+
+        weights : None, 'multinomial' or 'bayesian', (default None)
+            If 'multinomial' or 'bayesian', each resample is fitted with sample weights on the original X instead of a copy of the resampled rows (see Perc).
+
+        oob : boolean, (default False)
+            If True, each resample's model also scores the samples it left out. The out-of-bag predictions are stored as Y_pred_oob (NaN for samples in every resample) and their binary_metrics as oob_metrics. Use evaluate(testset='oob') to plot them (including the out-of-bag ROC curve).
+
+        n_jobs : None, -1 or a positive integer, (default None)
+            Number of worker processes used to fit the resamples (X is shared with the workers). -1 uses every CPU. The results are identical for any n_jobs.
+
+        If the model has a bagattr (e.g. 'model.beta_'), its value for every resample is also kept as the columns of self.bootbag.
         """
+        self._check_training_data()
         bootlist = self.bootlist
         if type is "bca":
-            boot = BCA(self, self.X, self.Y, self.bootlist, bootnum=bootnum)
+            boot = BCA(self, self.X, self.Y, self.bootlist, bootnum=bootnum, weights=weights, oob=oob, n_jobs=n_jobs)
         if type is "bc":
-            boot = BC(self, self.X, self.Y, self.bootlist, bootnum=bootnum)
+            boot = BC(self, self.X, self.Y, self.bootlist, bootnum=bootnum, weights=weights, oob=oob, n_jobs=n_jobs)
         if type is "perc":
-            boot = Perc(self, self.X, self.Y, self.bootlist, bootnum=bootnum)
+            boot = Perc(self, self.X, self.Y, self.bootlist, bootnum=bootnum, weights=weights, oob=oob, n_jobs=n_jobs)
         self.bootci = boot.run()
 
+        # Out-of-bag predictions and binary_metrics
+        if oob is True:
+            self.Y_pred_oob = boot.ypred_oob
+            self.oob_metrics = boot.oob_stats
+
+        # Keep bagattr (e.g. Beta) of every resample as columns of a matrix for bagged predictions
+        if len(boot.bootbag) > 0:
+            self.bootbag = np.column_stack(boot.bootbag)
+
     def plot_featureimportance(self, PeakTable, peaklist=None, ylabel="Label", sort=True):
         """Plots feature importance metrics.
 
@@ -279,6 +325,7 @@ class BaseModel(ABC):
         nperm : positive integer, (default 100)
             Number of permutations.
         """
+        self._check_training_data()
         fig = permutation_test(self, self.X, self.Y, nperm=nperm)
         output_notebook()
         show(fig)
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from .BaseModel import BaseModel
+from .PLS_SIMPLS import PLS_SIMPLS, PLSModel
+
+
+class PLS_OneVsRest(BaseModel):
+    """ One-vs-rest partial least-squares regression (SIMPLS) for more than 2 classes. A binary PLS_SIMPLS model is fitted for each class (class vs. the rest) in one batched call, so X is centered and X' * Y is calculated once for all classes.
+
+    Parameters
+    ----------
+    n_components : int, (default 2)
+        Number of components to keep (for each class).
+
+    dtype : numpy dtype or None, (default None)
+        Floating point type used for X and the calculations. If None, float64 is used.
+
+    retain_training_data : boolean, (default True)
+        If False, train does not keep X (Y and Y_pred are still kept).
+
+    classes : array-like or None, (default None)
+        Classes to fit a model for (in order). If None, the unique values of Y in train are used. Clones (e.g. for bootstrap resamples) get the classes of the trained model, so every resample has the same columns.
+
+    Methods
+    -------
+    train : Fit a model for each class to data.
+
+    test : Apply the models to test data and return the score for each class.
+
+    classify : Apply the models to test data and return the class with the highest score.
+
+    calc_bootci : Calculate bootstrap intervals for vip_ and coef_ (n_features x n_classes). Every resample needs to contain every class.
+
+    evaluate, permutation_test and plot_featureimportance are only available for binary models (PLS_SIMPLS).
+    """
+
+    bootlist = ["model.vip_", "model.coef_"]  # list of metrics to bootstrap
+
+    def __init__(self, n_components=2, dtype=None, retain_training_data=True, classes=None):
+        self.model = PLSModel()
+        self.n_component = n_components
+        self.dtype = dtype
+        self.retain_training_data = retain_training_data
+        self.classes = classes
+        self.classes_ = None
+
+    def train(self, X, Y):
+        """ Fit a PLS model for each class (class vs. the rest), save additional stats (as attributes) and return Y predicted values for each class.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Y : array-like, shape = [n_samples, 1]
+            Class label for each sample.
+
+        Returns
+        -------
+        y_pred_train : array-like, shape = [n_samples, n_classes]
+            Predicted y score for samples (one column for each class in classes_).
+        """
+
+        # Convert to numpy array if a DataFrame
+        if isinstance(X, pd.DataFrame):
+            X = np.array(X)
+        Y = np.array(Y).ravel()
+
+        # Error checks
+        classes = np.unique(Y) if self.classes is None else np.asarray(self.classes)
+        if len(classes) < 2:
+            raise ValueError("Y needs to have at least 2 groups. There is {}".format(len(classes)))
+        if X.shape[0] != len(Y):
+            raise ValueError("length of X does not match length of Y.")
+        if not np.isin(Y, classes).all():
+            raise ValueError("Y contains classes that are not in classes: {}".format(np.setdiff1d(Y, classes)))
+        missing = classes[~np.isin(classes, Y)]
+        if len(missing) > 0:
+            raise ValueError("Y has no samples of class {} (e.g. a bootstrap or jackknife resample left out a small class).".format(list(missing)))
+
+        # One-vs-rest response for each class, fitted in one batch
+        Yclass = (Y[:, np.newaxis] == classes[np.newaxis, :]).astype(int)
+        Beta, coef, vip = PLS_SIMPLS(n_components=self.n_component, dtype=self.dtype).train_many(X, Yclass)
+        self.classes_ = classes
+        self.model = PLSModel()
+        self.model.beta_ = Beta
+        self.model.coef_ = coef
+        self.model.vip_ = vip
+
+        # Calculate and return Y predicted value for each class
+        y_pred_train = X @ coef + Beta[0]
+
+        # Storing X (unless retain_training_data is False), Y, and Y_pred
+        self.X = X if self.retain_training_data is not False else None
+        self.Y = Y
+        self.Y_pred = y_pred_train
+        return y_pred_train
+
+    def test(self, X):
+        """Calculate and return Y predicted value for each class.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Test variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Returns
+        -------
+        y_pred_test : array-like, shape = [n_samples, n_classes]
+            Predicted y score for samples (one column for each class in classes_).
+        """
+        # Convert to X to numpy array if a DataFrame
+        if isinstance(X, pd.DataFrame):
+            X = np.array(X)
+
+        # Calculate and return Y predicted value
+        y_pred_test = X @ self.model.coef_ + self.model.beta_[0]
+        return y_pred_test
+
+    def get_params(self):
+        """Returns the hyper-parameters of the model as a dict (used by clone). classes is the classes of the trained model (if trained), so clones fit the same classes."""
+        classes = self.classes_ if self.classes_ is not None else self.classes
+        return {"n_components": self.n_component, "dtype": self.dtype, "retain_training_data": self.retain_training_data, "classes": classes}
+
+    def calc_bootci(self, bootnum=100, type="bca", weights=None, oob=False, n_jobs=None):
+        """Calculates bootstrap confidence intervals for bootlist (see BaseModel.calc_bootci). oob is not available, as binary_metrics needs a binary model."""
+        if oob is True:
+            raise ValueError("oob is only available for binary models (PLS_SIMPLS).")
+        super().calc_bootci(bootnum=bootnum, type=type, weights=weights, oob=oob, n_jobs=n_jobs)
+
+    def evaluate(self, *args, **kwargs):
+        """Not available: evaluate plots binary metrics for a single predicted score."""
+        raise NotImplementedError("evaluate is only available for binary models (PLS_SIMPLS). Use classify to get the predicted class.")
+
+    def permutation_test(self, *args, **kwargs):
+        """Not available: permutation_test uses binary metrics for a single predicted score."""
+        raise NotImplementedError("permutation_test is only available for binary models (PLS_SIMPLS).")
+
+    def plot_featureimportance(self, *args, **kwargs):
+        """Not available: plot_featureimportance plots one coefficient and VIP per peak."""
+        raise NotImplementedError("plot_featureimportance is only available for binary models (PLS_SIMPLS). Use model.coef_ and model.vip_ (one column for each class) and bootci.")
+
+    def classify(self, X):
+        """Return the class with the highest predicted score for each sample.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Test variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Returns
+        -------
+        y_class : array-like, shape = [n_samples]
+            Predicted class label for samples.
+        """
+        y_pred_test = self.test(X)
+        y_class = self.classes_[np.argmax(y_pred_test, axis=1)]
+        return y_class
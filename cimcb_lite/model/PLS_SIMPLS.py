@@ -1,14 +1,18 @@
-import math
+import json
+import os
 import numpy as np
 import pandas as pd
-from copy import deepcopy
+import scipy.sparse
+from scipy.sparse.linalg import LinearOperator
 from itertools import combinations
-from sklearn.cross_decomposition import PLSRegression
+from sklearn.model_selection import StratifiedKFold
 from bokeh.plotting import output_notebook, show
 from bokeh.layouts import gridplot
 from bokeh.plotting import ColumnDataSource, figure
 from .BaseModel import BaseModel
-from ..plot import scatter, distribution, roc_calculate, roc_plot, boxplot
+from ..plot import scatter, distribution, roc_calculate_many, roc_plot, boxplot
+from ..bootstrap import Perc
+from ..utils import Dataset, binary_metrics
 
 
 class PLS_SIMPLS(BaseModel):
@@ -19,12 +23,48 @@ class PLS_SIMPLS(BaseModel):
     n_components : int, (default 2)
         Number of components to keep.
 
+    solver : 'simpls', 'kernel' or 'auto', (default 'auto')
+        Solver used in train. 'simpls' works in feature space. 'kernel' works on the n_samples x n_samples matrix X0 * X0' (forming it costs n_samples^2 * n_features), so it is only faster for wide data (n_samples < n_features) with many components. 'auto' uses 'kernel' if n_features > n_samples and n_components >= 2 + n_samples / 30 (the crossover in benchmarks/benchmark_simpls.py), otherwise 'simpls'. scipy.sparse X always uses SIMPLS with implicit centering.
+
+    dtype : numpy dtype or None, (default None)
+        Floating point type used for X and the calculations. If None, float64 is used. Use np.float32 to keep float32 data as float32 (halves memory).
+
+    block_size : int, (default 1000)
+        Number of rows read at a time when X is an np.memmap (or a path to a .npy file).
+
+    retain_training_data : boolean, (default True)
+        If False, train does not keep X (calc_bootci and permutation_test then need X passed to the bootstrap classes or permutation_test directly). Y and Y_pred are still kept.
+
     Methods
     -------
     train : Fit model to data.
 
     test : Apply model to test data.
 
+    fit_path : Fit once and return Beta for every number of components from 1 to n_components.
+
+    fit_folds : Fit a model for each cross-validation fold and return their Beta paths.
+
+    predict : Apply model to test data in chunks without copying it (DataFrame columns are matched to the training peaks).
+
+    predict_iter : Apply model to each chunk of an iterable (e.g. a generator of DataFrames).
+
+    save : Save the arrays needed for scoring and reporting (not the training data).
+
+    load : Load a model saved with save (memory-mapped by default).
+
+    predict_bagged : Apply every bootstrap model (from calc_bootci) to test data and return the mean prediction and a 95% prediction interval.
+
+    freeze : Return a FrozenScorer with the scaling (mu and sigma from scale) folded into the coefficients, for scoring unscaled X.
+
+    train_many : Fit a separate model to each column of a response matrix (e.g. permuted Y) in one batched pass.
+
+    partial_fit : Update the model with a new batch of samples without revisiting earlier batches.
+
+    rfe : Recursive feature elimination (lowest VIP, or coefficient CI crossing zero) with R² and Q² for each step.
+
+    clone : Return an untrained model with the same hyper-parameters.
+
     evaluate : Evaluate model.
 
     calc_bootci : Calculate bootstrap intervals for plot_featureimportance.
@@ -35,21 +75,35 @@ class PLS_SIMPLS(BaseModel):
     """
 
     bootlist = ["model.vip_", "model.coef_"]  # list of metrics to bootstrap
+    bagattr = "model.beta_"  # kept for every bootstrap resample (see predict_bagged)
+    savelist = ["beta_", "vip_", "x_loadings_", "y_loadings_", "x_weights_", "pctvar_", "x_mean_", "y_mean_"]  # list of arrays to save (coef_ is beta_[1:])
 
-    def __init__(self, n_components=2):
-        self.model = PLSRegression()  # Should change this to an empty model
+    def __init__(self, n_components=2, solver="auto", dtype=None, block_size=1000, retain_training_data=True):
+        if solver not in ["auto", "simpls", "kernel"]:
+            raise ValueError("solver has to be either 'auto', 'simpls' or 'kernel'.")
+        self.model = PLSModel()
         self.n_component = n_components
+        self.solver = solver
+        self.dtype = dtype
+        self.block_size = block_size
+        self.retain_training_data = retain_training_data
+        self.feature_index = None
+        self._aligned_coef_cache = {}
+        self._partial_state = None
 
-    def train(self, X, Y):
+    def train(self, X, Y=None, sample_weight=None):
         """ Fit the PLS model, save additional stats (as attributes) and return Y predicted values.
 
         Parameters
         ----------
-        X : array-like, shape = [n_samples, n_features]
-            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+        X : array-like or Dataset, shape = [n_samples, n_features]
+            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors. X can be an np.memmap (or a path to a .npy file), which is read in blocks of block_size rows and never fully loaded into memory. If X is a Dataset (validated when it was built), Y is taken from it and only the cheap error checks are repeated.
 
         Y : array-like, shape = [n_samples, 1]
-            Response variables, where n_samples is the number of samples.
+            Response variables, where n_samples is the number of samples (ignored if X is a Dataset).
+
+        sample_weight : array-like, shape = [n_samples] or None, (default None)
+            Non-negative weight for each sample (used for the means and cross-products). Integer counts give the same model as repeating each row that many times (e.g. bootstrap counts), without copying X. With sample_weight, x_scores_ and y_scores_ are the scores of the weighted rows, sqrt(sample_weight) * X0 * R.
 
         Returns
         -------
@@ -57,25 +111,68 @@ class PLS_SIMPLS(BaseModel):
             Predicted y score for samples.
         """
 
+        # Use the validated matrix and Y of a Dataset
+        dataset = None
+        if isinstance(X, Dataset):
+            dataset = X
+            X = dataset.X
+            Y = dataset.Y
+
+        # Memory-map X if it is a path to a .npy file
+        if isinstance(X, str):
+            X = np.load(X, mmap_mode="r")
+
+        # Store the peak name -> index map (used by predict to match DataFrame columns)
+        self.feature_index = None
+        self._aligned_coef_cache = {}
+        self._partial_state = None
+        if isinstance(X, pd.DataFrame):
+            self.feature_index = {name: i for i, name in enumerate(X.columns)}
+        elif dataset is not None:
+            self.feature_index = dataset.peak_index
+
         # Convert to numpy array if a DataFrame
         if isinstance(X, pd.DataFrame or pd.Series):
             X = np.array(X)
             Y = np.array(Y).ravel()
+        if isinstance(X, np.memmap):
+            # Column means and sum of squares in one pass over the blocks (also checks for NaNs)
+            meanX, sumsqX0 = block_stats(X, block_size=self.block_size, sample_weight=sample_weight)
+            Xop = block_operator(X, block_size=self.block_size, dtype=self.dtype)
+        else:
+            X = self._as_dtype(X)
 
-        # Error checks
-        if np.isnan(X).any() is True:
+        # Error checks (samples with a weight of 0 are left out of the Y checks)
+        Ycheck = Y
+        if sample_weight is not None:
+            sample_weight = np.asarray(sample_weight, dtype=np.float64).ravel()
+            if len(sample_weight) != X.shape[0]:
+                raise ValueError("length of sample_weight does not match length of X.")
+            if (sample_weight < 0).any():
+                raise ValueError("sample_weight should not contain negative values.")
+            Ycheck = np.asarray(Y)[sample_weight > 0]
+        if dataset is not None:
+            dataset.check_binary()
+            if np.min(Ycheck) == np.max(Ycheck):
+                raise ValueError("Y needs to have 2 groups. There is 1")
+        elif not isinstance(X, np.memmap) and np.isnan(X.data if scipy.sparse.issparse(X) else X).any():
             raise ValueError("NaNs found in X.")
-        if len(np.unique(Y)) != 2:
-            raise ValueError("Y needs to have 2 groups. There is {}".format(len(np.unique(Y))))
-        if np.sort(np.unique(Y))[0] != 0:
-            raise ValueError("Y should only contain 0s and 1s.")
-        if np.sort(np.unique(Y))[1] != 1:
-            raise ValueError("Y should only contain 0s and 1s.")
-        if len(X) != len(Y):
-            raise ValueError("length of X does not match length of Y.")
+        if dataset is None:
+            if len(np.unique(Ycheck)) != 2:
+                raise ValueError("Y needs to have 2 groups. There is {}".format(len(np.unique(Ycheck))))
+            if np.sort(np.unique(Ycheck))[0] != 0:
+                raise ValueError("Y should only contain 0s and 1s.")
+            if np.sort(np.unique(Ycheck))[1] != 1:
+                raise ValueError("Y should only contain 0s and 1s.")
+            if X.shape[0] != len(Y):
+                raise ValueError("length of X does not match length of Y.")
 
-        # Calculates and store attributes of PLS SIMPLS
-        Xscores, Yscores, Xloadings, Yloadings, Weights, Beta = self.pls_simpls(X, Y, ncomp=self.n_component)
+        # Calculates and store attributes of PLS SIMPLS (vip_ and pctvar_ are calculated when first accessed)
+        self.model = PLSModel()
+        if isinstance(X, np.memmap):
+            Xscores, Yscores, Xloadings, Yloadings, Weights, Beta = self.pls_simpls_implicit(Xop, Y, ncomp=self.n_component, meanX=meanX.astype(Xop.dtype), sample_weight=sample_weight)
+        else:
+            Xscores, Yscores, Xloadings, Yloadings, Weights, Beta = self._solve(X, Y, ncomp=self.n_component, sample_weight=sample_weight)
         self.model.x_scores_ = Xscores
         self.model.y_scores_ = Yscores
         self.model.x_loadings_ = Xloadings
@@ -83,21 +180,38 @@ class PLS_SIMPLS(BaseModel):
         self.model.x_weights_ = Weights
         self.model.beta_ = Beta
 
-        # Calculate pctvar, flatten coef_ and vip for future use
-        meanX = np.mean(X, axis=0)
-        X0 = X - meanX
-        self.model.pctvar_ = sum(abs(self.model.x_loadings_) ** 2) / sum(sum(abs(X0) ** 2)) * 100
+        # Store the means and flatten coef_ for future use (pctvar_ needs the sum of squares of the centered X, which block_stats already calculated for memmap X)
+        if isinstance(X, np.memmap):
+            self.model._sumsqX0 = sumsqX0
+        elif sample_weight is None:
+            meanX = np.asarray(X.mean(axis=0)).ravel()
+            self.model._X = X
+        else:
+            meanX = np.asarray(X.T @ sample_weight).ravel() / np.sum(sample_weight)
+            self.model._X = X
+            self.model._sample_weight = sample_weight
+        if self.retain_training_data is False and self.model._X is not None:
+            # Calculate the sum of squares now, so X is not kept for pctvar_
+            self.model._sumsqX0 = centered_sumsq(X, meanX, sample_weight)
+            self.model._X = None
+            self.model._sample_weight = None
+        self.model.x_mean_ = meanX.astype(Beta.dtype)
+        if sample_weight is None:
+            self.model.y_mean_ = np.mean(Y, axis=0, dtype=Beta.dtype)
+        else:
+            self.model.y_mean_ = np.asarray(np.dot(sample_weight, Y) / np.sum(sample_weight), dtype=Beta.dtype)
         self.model.coef_ = Beta[1:]
-        W0 = Weights / np.sqrt(np.sum(Weights ** 2, axis=0))
-        sumSq = np.sum(Xscores ** 2, axis=0) * np.sum(Yloadings ** 2, axis=0)
-        self.model.vip_ = np.sqrt(len(Xloadings) * np.sum(sumSq * W0 ** 2, axis=1) / np.sum(sumSq, axis=0))
 
-        # Calculate and return Y predicted value
-        newX = np.insert(X, 0, np.ones(len(X)), axis=1)
-        y_pred_train = np.matmul(newX, Beta)
+        # Calculate and return Y predicted value (X0 * Beta = Xscores * Yloadings', so X is not used again unless the scores are weighted)
+        if sample_weight is None:
+            y_pred_train = np.matmul(Xscores, Yloadings[0]) + self.model.y_mean_
+        elif isinstance(X, np.memmap):
+            y_pred_train = Xop @ Beta[1:] + Beta[0]
+        else:
+            y_pred_train = X @ Beta[1:] + Beta[0]
 
-        # Storing X, Y, and Y_pred
-        self.X = X
+        # Storing X (unless retain_training_data is False), Y, and Y_pred
+        self.X = X if self.retain_training_data is not False else None
         self.Y = Y
         self.Y_pred = y_pred_train
         return y_pred_train
@@ -115,15 +229,627 @@ class PLS_SIMPLS(BaseModel):
         y_pred_test : array-like, shape = [n_samples, 1]
             Predicted y score for samples.
         """
+        # Memory-map X if it is a path to a .npy file
+        if isinstance(X, str):
+            X = np.load(X, mmap_mode="r")
+
         # Convert to X to numpy array if a DataFrame
         if isinstance(X, pd.DataFrame or pd.Series):
             X = np.array(X)
+        if isinstance(X, np.memmap):
+            X = block_operator(X, block_size=self.block_size, dtype=self.dtype)
+        elif self.dtype is not None:
+            X = self._as_dtype(X)
 
-        # Calculate and return Y predicted value
-        newX = np.insert(X, 0, np.ones(len(X)), axis=1)
-        y_pred_test = np.matmul(newX, self.model.beta_)
+        # Calculate and return Y predicted value (X is not copied, and sparse or memory-mapped X is not densified)
+        y_pred_test = X @ self.model.beta_[1:] + self.model.beta_[0]
         return y_pred_test
 
+    def predict(self, X, chunk_size=None):
+        """ Calculate and return Y predicted value, scoring chunk_size rows at a time into a preallocated array. X is never copied (the intercept is added to X * coef_).
+
+        Parameters
+        ----------
+        X : array-like, np.memmap, path to a .npy file or DataFrame, shape = [n_samples, n_features]
+            Test variables, where n_samples is the number of samples and n_features is the number of predictors. If X is a DataFrame and the model was trained on a DataFrame, the columns are matched to the training peaks by name.
+
+        chunk_size : positive integer or None, (default None)
+            Number of rows scored at a time. If None, X is scored in one chunk.
+
+        Returns
+        -------
+        y_pred_test : array-like, shape = [n_samples]
+            Predicted y score for samples.
+        """
+        # Memory-map X if it is a path to a .npy file
+        if isinstance(X, str):
+            X = np.load(X, mmap_mode="r")
+
+        n = X.shape[0]
+        if chunk_size is None:
+            chunk_size = max(n, 1)
+        y_pred_test = np.empty(n, dtype=self.model.beta_.dtype)
+        for start in range(0, n, chunk_size):
+            if isinstance(X, pd.DataFrame):
+                chunk = X.iloc[start : start + chunk_size]
+            else:
+                chunk = X[start : start + chunk_size]
+            y_pred_test[start : start + chunk.shape[0]] = self._predict_chunk(chunk)
+        return y_pred_test
+
+    def predict_iter(self, chunks):
+        """ Yield Y predicted values for each chunk, e.g. a generator of DataFrames read from a file that does not fit in memory.
+
+        Parameters
+        ----------
+        chunks : iterable of array-like or DataFrame, shape = [n_chunk_samples, n_features]
+            Test variables for each chunk. DataFrame columns are matched to the training peaks by name (if the model was trained on a DataFrame).
+
+        Yields
+        ------
+        y_pred_chunk : array-like, shape = [n_chunk_samples]
+            Predicted y score for the samples in the chunk.
+        """
+        for chunk in chunks:
+            yield self._predict_chunk(chunk)
+
+    def _predict_chunk(self, X):
+        """Calculates Y predicted value for one chunk of X (DataFrame columns are matched to the training peaks by reordering coef_, not X)."""
+        coef = self.model.coef_
+        if isinstance(X, pd.DataFrame):
+            if self.feature_index is not None:
+                coef = self._aligned_coef(tuple(X.columns))
+            X = X.values
+        return X @ coef + self.model.beta_[0]
+
+    def _aligned_coef(self, columns):
+        """Returns coef_ in the order of columns using the peak name -> index map from train (cached for each column order, see aligned_coef)."""
+        if columns not in self._aligned_coef_cache:
+            self._aligned_coef_cache[columns] = aligned_coef(self.model.coef_, self.feature_index, columns)
+        return self._aligned_coef_cache[columns]
+
+    def predict_bagged(self, X):
+        """ Calculate the Y predicted value of every bootstrap model from calc_bootci (one matrix product with the n_features + 1 x bootnum matrix bootbag), and return the mean and a 95% percentile interval for each sample.
+
+        Parameters
+        ----------
+        X : array-like or DataFrame, shape = [n_samples, n_features]
+            Test variables, where n_samples is the number of samples and n_features is the number of predictors. If X is a DataFrame and the model was trained on a DataFrame, the columns are matched to the training peaks by name (as in predict).
+
+        Returns
+        -------
+        y_pred_mean : array-like, shape = [n_samples]
+            Mean predicted y score of the bootstrap models for samples.
+
+        y_pred_ci : array-like, shape = [n_samples, 2]
+            2.5 and 97.5 percentiles of the predicted y score of the bootstrap models for samples.
+        """
+        if not hasattr(self, "bootbag"):
+            raise ValueError("Use method calc_bootci prior to predict_bagged.")
+
+        # Match DataFrame columns to the training peaks by reordering the rows of bootbag (not cached, as calc_bootci can replace bootbag)
+        coef = self.bootbag[1:]
+        if isinstance(X, pd.DataFrame):
+            if self.feature_index is not None:
+                coef = aligned_coef(coef, self.feature_index, tuple(X.columns))
+            X = X.values
+        if self.dtype is not None:
+            X = self._as_dtype(X)
+
+        # Score all bootstrap models at once
+        y_pred_boot = X @ coef + self.bootbag[0]
+        y_pred_mean = np.mean(y_pred_boot, axis=1)
+        y_pred_ci = np.percentile(y_pred_boot, [2.5, 97.5], axis=1).T
+        return y_pred_mean, y_pred_ci
+
+    def freeze(self, mu, sigma, method="auto"):
+        """ Return a FrozenScorer that applies scale (with the stored mu and sigma) and the model in one step. Every scale method is affine, so the scaling is folded into the coefficients and the intercept: for z = (x - mu) * a, the score z * coef + b0 equals x * (a * coef) + b0 - (mu * a) * coef. Unscaled X is then scored with one matrix-vector product and no scaled copy of X.
+
+        Parameters
+        ----------
+        mu : array-like, shape = [n_features]
+            mu used to scale the training data (e.g. from scale(..., return_mu_sigma=True)).
+
+        sigma : array-like, shape = [n_features]
+            sigma used to scale the training data.
+
+        method : string, (default "auto")
+            Method used to scale the training data. Accepted methods are 'auto', 'pareto', 'vast' and 'level'.
+
+        Returns
+        -------
+        scorer : FrozenScorer
+            Scorer for unscaled X.
+        """
+        coef = np.asarray(self.model.coef_, dtype=np.float64).ravel()
+        mu = np.asarray(mu, dtype=np.float64).ravel()
+        sigma = np.asarray(sigma, dtype=np.float64).ravel()
+
+        # Error checks
+        if len(mu) != len(coef):
+            raise ValueError("Length of mu array does not match the number of features in the model.")
+        if len(sigma) != len(coef):
+            raise ValueError("Length of sigma array does not match the number of features in the model.")
+
+        # Per-feature multiplier of (x - mu) for the scale method
+        if method == "auto":
+            a = 1 / sigma
+        elif method == "pareto":
+            a = 1 / np.sqrt(sigma)
+        elif method == "vast":
+            a = mu / sigma ** 2
+        elif method == "level":
+            a = 1 / mu
+        else:
+            raise ValueError("Method has to be either 'auto', 'pareto', 'vast', or 'level'.")
+
+        # Fold the scaling into the coefficients and the intercept
+        dtype = self.model.beta_.dtype
+        coef_frozen = (a * coef).astype(dtype)
+        intercept = float(self.model.beta_[0]) - np.dot(mu * a, coef)
+        return FrozenScorer(coef_frozen, intercept, feature_index=self.feature_index)
+
+    def save(self, path):
+        """ Save the arrays needed for scoring and reporting (beta_, vip_, loadings, weights, pctvar_ and means, plus bootci and bootbag if calculated) as .npy files in the directory path. The training data (X, Y, Y_pred and scores) is not saved.
+
+        Parameters
+        ----------
+        path : string
+            Directory to save the model in (created if it does not exist).
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in self.savelist:
+            np.save(os.path.join(path, name + ".npy"), getattr(self.model, name))
+        bootci = []
+        if hasattr(self, "bootci"):
+            for name in self.bootci.keys():
+                np.save(os.path.join(path, "bootci." + name + ".npy"), self.bootci[name])
+                bootci.append(name)
+        if hasattr(self, "bootbag"):
+            np.save(os.path.join(path, "bootbag.npy"), self.bootbag)
+
+        # Hyper-parameters and peak names
+        feature_names = None
+        if self.feature_index is not None:
+            feature_names = [i.item() if isinstance(i, np.generic) else i for i in self.feature_index.keys()]
+        params = {"n_components": self.n_component, "solver": self.solver, "dtype": None if self.dtype is None else np.dtype(self.dtype).name, "block_size": self.block_size, "feature_names": feature_names, "bootci": bootci, "bootbag": hasattr(self, "bootbag")}
+        with open(os.path.join(path, "params.json"), "w") as f:
+            json.dump(params, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ Load a model saved with save. The model can be used for test, predict and plot_featureimportance.
+
+        Parameters
+        ----------
+        path : string
+            Directory the model was saved in.
+
+        mmap : boolean, (default True)
+            If mmap is True, the arrays are memory-mapped (read-only) instead of read into memory.
+
+        Returns
+        -------
+        model : PLS_SIMPLS
+            Model with the saved attributes.
+        """
+        if os.path.isdir(path) is False:
+            raise ValueError("{} does not exist.".format(path))
+        with open(os.path.join(path, "params.json")) as f:
+            params = json.load(f)
+
+        mmap_mode = "r" if mmap is True else None
+        model = cls(n_components=params["n_components"], solver=params["solver"], dtype=params["dtype"], block_size=params["block_size"])
+        for name in cls.savelist:
+            setattr(model.model, name, np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode))
+        model.model.coef_ = model.model.beta_[1:]
+        if len(params["bootci"]) > 0:
+            model.bootci = {}
+            for name in params["bootci"]:
+                model.bootci[name] = np.load(os.path.join(path, "bootci." + name + ".npy"), mmap_mode=mmap_mode)
+        if params.get("bootbag", False) is True:
+            model.bootbag = np.load(os.path.join(path, "bootbag.npy"), mmap_mode=mmap_mode)
+        if params["feature_names"] is not None:
+            model.feature_index = {name: i for i, name in enumerate(params["feature_names"])}
+        return model
+
+    def fit_path(self, X, Y, max_components=None):
+        """ Fit the PLS model once and return Beta for 1 to max_components components. SIMPLS components are nested, so column k-1 matches the Beta of a model trained with k components.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Y : array-like, shape = [n_samples, 1]
+            Response variables, where n_samples is the number of samples.
+
+        max_components : int or None, (default None)
+            Largest number of components in the path. If None, n_components is used.
+
+        Returns
+        -------
+        beta_path : array-like, shape = [n_features + 1, max_components]
+            Regression coefficients for each number of components (the first row is the intercept).
+        """
+
+        # Convert to numpy array if a DataFrame
+        if isinstance(X, pd.DataFrame):
+            X = np.array(X)
+            Y = np.array(Y).ravel()
+        X = self._as_dtype(X)
+        if max_components is None:
+            max_components = self.n_component
+
+        # Error checks
+        if X.shape[0] != len(Y):
+            raise ValueError("length of X does not match length of Y.")
+        if max_components < 1:
+            raise ValueError("max_components must be greater than zero.")
+
+        # Beta for k components is the sum of the first k (weight * y loading) terms
+        Xscores, Yscores, Xloadings, Yloadings, Weights, Beta = self._solve(X, Y, ncomp=max_components)
+        beta_path = np.cumsum(Weights * Yloadings, axis=1)
+        beta_path_add = np.mean(Y, axis=0, dtype=X.dtype) - np.matmul(np.asarray(X.mean(axis=0)).ravel(), beta_path)
+        beta_path = np.vstack([beta_path_add, beta_path])
+        return beta_path
+
+    def fit_folds(self, X, Y, testidx, max_components=None):
+        """ Fit a PLS model for each cross-validation fold (leaving out the rows in testidx) and return the Beta path (see fit_path) for each fold. The full data cross-products are calculated once and downdated for each fold.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Y : array-like, shape = [n_samples, 1]
+            Response variables, where n_samples is the number of samples.
+
+        testidx : list of array-like
+            Held-out (test) row indices for each fold.
+
+        max_components : int or None, (default None)
+            Largest number of components in the path. If None, n_components is used.
+
+        Returns
+        -------
+        beta_folds : array-like, shape = [n_folds, n_features + 1, max_components]
+            Regression coefficients for each fold and number of components (the first row is the intercept).
+        """
+
+        # Convert to numpy array if a DataFrame
+        if isinstance(X, pd.DataFrame):
+            X = np.array(X)
+            Y = np.array(Y).ravel()
+        X = self._as_dtype(X)
+        if max_components is None:
+            max_components = self.n_component
+
+        # Error checks
+        if X.shape[0] != len(Y):
+            raise ValueError("length of X does not match length of Y.")
+        if max_components < 1:
+            raise ValueError("max_components must be greater than zero.")
+
+        beta_folds = self.pls_simpls_folds(X, Y, testidx, ncomp=max_components)
+        return beta_folds
+
+    def train_many(self, X, Y):
+        """ Fit a separate PLS model to each column of Y (sharing the same X) and return the stacked Beta, coef and VIP.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Y : array-like, shape = [n_samples, n_responses]
+            Response variables, where each column is a binary (0s and 1s) response e.g. a permuted Y.
+
+        Returns
+        -------
+        beta : array-like, shape = [n_features + 1, n_responses]
+            Regression coefficients for each response (the first row is the intercept).
+
+        coef : array-like, shape = [n_features, n_responses]
+            Regression coefficients for each response (excluding the intercept).
+
+        vip : array-like, shape = [n_features, n_responses]
+            Variable Importance in Projection for each response.
+        """
+
+        # Convert to numpy array if a DataFrame
+        if isinstance(X, pd.DataFrame):
+            X = np.array(X)
+        X = self._as_dtype(X)
+        Y = np.array(Y)
+        if Y.ndim == 1:
+            Y = Y.reshape(-1, 1)
+
+        # Error checks
+        if np.isnan(X.data if scipy.sparse.issparse(X) else X).any():
+            raise ValueError("NaNs found in X.")
+        if X.shape[0] != len(Y):
+            raise ValueError("length of X does not match length of Y.")
+        if not np.isin(Y, [0, 1]).all():
+            raise ValueError("Y should only contain 0s and 1s.")
+        if (Y.min(axis=0) == Y.max(axis=0)).any():
+            raise ValueError("Each column of Y needs to have 2 groups.")
+
+        # Fit every response at once
+        Xscores, Yloadings, Weights, Beta = self.pls_simpls_many(X, Y, ncomp=self.n_component)
+        coef = Beta[1:]
+
+        # VIP for each response
+        W0 = Weights / np.sqrt(np.sum(Weights ** 2, axis=0))
+        sumSq = np.sum(Xscores ** 2, axis=0) * Yloadings ** 2
+        vip = np.sqrt(len(W0) * np.einsum("dim,im->dm", W0 ** 2, sumSq) / np.sum(sumSq, axis=0))
+        return Beta, coef, vip
+
+    def partial_fit(self, X, Y):
+        """ Update the PLS model with a new batch of samples and return Y predicted values for the batch. The sample count, column means, centered X'*X and X'*Y of all batches so far are kept and merged with the batch (pairwise update of Chan et al.), and the SIMPLS components are refitted from them, so earlier batches are never revisited. The result matches train on all the batches combined (up to rounding).
+
+        Memory: X'*X is kept as a factor L with X'*X = L' * L (the centered rows of each batch, plus one row for the change of the means), so the state has min(n_samples, n_features) x n_features elements. Once L has more rows than columns it is compressed to the n_features x n_features R factor of its QR decomposition, so for data with more samples than peaks the state is the size of a dense X'*X (about 3.2 GB for 20k peaks).
+
+        The first call starts a new model (train does not keep this state, so include its data in the first batch to continue from it). The components are only refitted once both groups (and more than n_components samples) have been seen.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_batch_samples, n_features]
+            Predictor variables for the new batch. If the first batch is a DataFrame, the columns of later DataFrame batches are matched to it by name.
+
+        Y : array-like, shape = [n_batch_samples, 1]
+            Response variables (0s and 1s) for the new batch.
+
+        Returns
+        -------
+        y_pred_batch : array-like, shape = [n_batch_samples, 1]
+            Predicted y score for the samples in the batch (None if the components have not been fitted yet).
+        """
+
+        # Match the columns of the first batch, and convert to numpy array if a DataFrame
+        if self._partial_state is None:
+            self.model = PLSModel()
+            self.feature_index = None
+            self._aligned_coef_cache = {}
+            if isinstance(X, pd.DataFrame):
+                self.feature_index = {name: i for i, name in enumerate(X.columns)}
+        if isinstance(X, pd.DataFrame):
+            if self.feature_index is not None:
+                X = X[list(self.feature_index.keys())]
+            X = np.array(X)
+        X = self._as_dtype(X)
+        if scipy.sparse.issparse(X):
+            X = X.toarray()
+        Y = np.array(Y).ravel()
+
+        # Error checks
+        if np.isnan(X).any():
+            raise ValueError("NaNs found in X.")
+        if X.shape[0] != len(Y):
+            raise ValueError("length of X does not match length of Y.")
+        if X.shape[0] == 0:
+            raise ValueError("X needs to have at least 1 sample.")
+        if not np.isin(Y, [0, 1]).all():
+            raise ValueError("Y should only contain 0s and 1s.")
+        if self._partial_state is not None and X.shape[1] != len(self._partial_state["meanX"]):
+            raise ValueError("X has {} features, but the model has {}.".format(X.shape[1], len(self._partial_state["meanX"])))
+
+        # Batch statistics (accumulated in float64)
+        nbatch = X.shape[0]
+        Xbatch = np.asarray(X, dtype=np.float64)
+        Ybatch = np.asarray(Y, dtype=np.float64)
+        meanXbatch = np.mean(Xbatch, axis=0)
+        meanYbatch = np.mean(Ybatch)
+        X0batch = Xbatch - meanXbatch
+        XtYbatch = np.matmul(X0batch.T, Ybatch - meanYbatch)
+
+        # Merge with the state of the previous batches (X'*X = L' * L, with a row for the change of the means)
+        state = self._partial_state
+        if state is None:
+            state = {"n": nbatch, "meanX": meanXbatch, "meanY": meanYbatch, "L": X0batch, "XtY": XtYbatch}
+        else:
+            total = state["n"] + nbatch
+            deltaX = meanXbatch - state["meanX"]
+            deltaY = meanYbatch - state["meanY"]
+            scale = state["n"] * nbatch / total
+            state["L"] = np.vstack([state["L"], X0batch, np.sqrt(scale) * deltaX])
+            state["XtY"] += XtYbatch + scale * deltaX * deltaY
+            state["meanX"] = state["meanX"] + deltaX * nbatch / total
+            state["meanY"] = state["meanY"] + deltaY * nbatch / total
+            state["n"] = total
+        if state["L"].shape[0] > state["L"].shape[1]:
+            state["L"] = np.linalg.qr(state["L"], mode="r")
+        self._partial_state = state
+
+        # Refit the components once there are 2 groups and enough samples
+        if state["meanY"] in [0, 1] or self.n_component > min(state["n"] - 1, len(state["meanX"])):
+            return None
+        dtype = np.float64 if self.dtype is None else self.dtype
+        L = state["L"]
+        XtX = LinearOperator((L.shape[1], L.shape[1]), matvec=lambda r: np.matmul(L.T, np.matmul(L, r)), dtype=L.dtype)
+        Xloadings, Yloadings, Weights, Beta = self.pls_simpls_cov(XtX, state["XtY"], state["meanX"], state["meanY"], ncomp=self.n_component)
+        self.model.x_loadings_ = Xloadings.astype(dtype)
+        self.model.y_loadings_ = Yloadings.astype(dtype)
+        self.model.x_weights_ = Weights.astype(dtype)
+        self.model.beta_ = Beta.astype(dtype)
+        self.model.coef_ = self.model.beta_[1:]
+        self.model.x_mean_ = state["meanX"].astype(dtype)
+        self.model.y_mean_ = np.asarray(state["meanY"], dtype=dtype)
+        self._aligned_coef_cache = {}
+
+        # Calculate pctvar and vip (the scores have unit length, so sum(Xscores ** 2) is 1)
+        self.model.pctvar_ = (np.sum(Xloadings ** 2, axis=0) / np.sum(L ** 2) * 100).astype(dtype)
+        W0 = Weights / np.sqrt(np.sum(Weights ** 2, axis=0))
+        sumSq = np.sum(Yloadings ** 2, axis=0)
+        self.model.vip_ = np.sqrt(len(Xloadings) * np.sum(sumSq * W0 ** 2, axis=1) / np.sum(sumSq, axis=0)).astype(dtype)
+
+        # Calculate and return Y predicted value for the batch
+        y_pred_batch = X @ self.model.beta_[1:] + self.model.beta_[0]
+        return y_pred_batch
+
+    def get_params(self):
+        """Returns the hyper-parameters of the model as a dict (used by clone)."""
+        return {"n_components": self.n_component, "solver": self.solver, "dtype": self.dtype, "block_size": self.block_size, "retain_training_data": self.retain_training_data}
+
+    def rfe(self, X, Y, step=1, min_features=None, criterion="vip", folds=10, bootnum=100):
+        """ Recursive feature elimination. At each step the model is fitted to the remaining peaks, R² and the cross-validated Q² are calculated, and the step peaks with the lowest VIP (or, if criterion is 'coefci', the lowest-VIP peaks whose bootstrap coefficient 95% CI crosses zero) are removed. The model is fitted in kernel form, and the centered gram matrix X0 * X0' is calculated once and downdated by subtracting the removed (centered) columns at each step (the column means of the remaining peaks do not change). The kernels of the cross-validation folds are blocks of the same gram matrix, so Q² does not use X0 at all.
+
+        Parameters
+        ----------
+        X : array-like, shape = [n_samples, n_features]
+            Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+
+        Y : array-like, shape = [n_samples, 1]
+            Response variables, where n_samples is the number of samples.
+
+        step : int or float, (default 1)
+            Number of peaks to remove at each step. If step is a float between 0 and 1, it is the fraction of the remaining peaks (at least 1).
+
+        min_features : int or None, (default None)
+            Smallest number of peaks to keep. If None (or less than n_components), n_components is used.
+
+        criterion : 'vip' or 'coefci', (default 'vip')
+            'vip' removes the peaks with the lowest VIP. 'coefci' removes the lowest-VIP peaks whose percentile bootstrap 95% CI of the coefficient crosses zero, and stops when there are none.
+
+        folds : a positive integer, (default 10)
+            The number of (stratified) folds used for Q².
+
+        bootnum : a positive integer, (default 100)
+            The number of bootstrap samples used for the coefficient CI (if criterion is 'coefci').
+
+        Returns
+        -------
+        rfe_table : DataFrame
+            One row for each step, with the number of peaks, R², Q² and the peaks kept (column indices, or column names if X is a DataFrame).
+        """
+
+        # Convert to numpy array if a DataFrame
+        names = None
+        if isinstance(X, pd.DataFrame):
+            names = np.array(X.columns)
+            X = np.array(X)
+            Y = np.array(Y).ravel()
+        if scipy.sparse.issparse(X):
+            X = X.toarray()
+        X = self._as_dtype(X)
+        Y = np.asarray(Y)
+        if min_features is None or min_features < self.n_component:
+            min_features = self.n_component
+
+        # Error checks
+        if criterion not in ["vip", "coefci"]:
+            raise ValueError("criterion has to be either 'vip' or 'coefci'.")
+        if step <= 0:
+            raise ValueError("step must be greater than zero.")
+        if np.isnan(X).any():
+            raise ValueError("NaNs found in X.")
+        if X.shape[0] != len(Y):
+            raise ValueError("length of X does not match length of Y.")
+        if not np.isin(Y, [0, 1]).all() or len(np.unique(Y)) != 2:
+            raise ValueError("Y should only contain 0s and 1s (for 2 groups).")
+
+        testidx = [test for train, test in StratifiedKFold(n_splits=folds).split(X, Y)]
+        trainidx = [np.setdiff1d(np.arange(len(Y)), test) for test in testidx]
+        meanY = np.mean(Y, dtype=X.dtype)
+
+        # The remaining peaks are the first m columns of X0 (column j is peak kept[j]), so X0[:, :m] is a view. X0 is column-major, so removed peaks are overwritten by moving the last remaining columns into their place.
+        X0 = np.asfortranarray(X - np.mean(X, axis=0))
+        kept = np.arange(X.shape[1])
+        m = X.shape[1]
+        gram = np.matmul(X0, X0.T)
+        rfe_list = []
+        while True:
+            X0kept = X0[:, :m]
+
+            # Full fit on the downdated gram matrix (X0 is already centered)
+            Xscores, Yscores, Xloadings, Yloadings, Weights, Beta = self.pls_kernel(X0kept, Y, ncomp=self.n_component, gram=gram, centered=True)
+            ypred_full = np.matmul(Xscores, Yloadings[0]) + meanY
+
+            # Q² with the fold kernels taken from the downdated gram matrix (the blocks of the training rows are re-centered by their own means)
+            ypred_cv = np.zeros(len(Y), dtype=X.dtype)
+            for train, test in zip(trainidx, testidx):
+                gram_train = gram[np.ix_(train, train)]
+                meanY_train = np.mean(Y[train], dtype=X.dtype)
+                Xscores_f, Yloadings_f, Rcoef_f = kernel_components(double_center(gram_train), Y[train] - meanY_train, self.n_component)
+                gram_cross = gram[np.ix_(test, train)]
+                meanG = np.mean(gram_train, axis=0)
+                K_cross = gram_cross - np.mean(gram_cross, axis=1, keepdims=True) - meanG + np.mean(meanG)
+                ypred_cv[test] = np.matmul(K_cross, np.matmul(Rcoef_f, Yloadings_f)) + meanY_train
+            features = np.sort(kept[:m])
+            rfe_list.append({"n_features": m, "R²": binary_metrics(Y, ypred_full)["R²"], "Q²": binary_metrics(Y, ypred_cv)["R²"], "features": features if names is None else names[features]})
+
+            # Number of peaks to remove
+            if isinstance(step, float) and step < 1:
+                nremove = max(1, int(step * m))
+            else:
+                nremove = int(step)
+            nremove = min(nremove, m - min_features)
+            if nremove <= 0:
+                break
+
+            # VIP of the remaining peaks (the scores have unit length)
+            W0 = Weights / np.sqrt(np.sum(Weights ** 2, axis=0))
+            sumSq = np.sum(Yloadings ** 2, axis=0)
+            vip = np.sqrt(m * np.sum(sumSq * W0 ** 2, axis=1) / np.sum(sumSq))
+
+            # Peaks to remove (ties are broken by the column index in X)
+            if criterion == "vip":
+                remove = np.lexsort((kept[:m], vip))[:nremove]
+            else:
+                model_kept = self.clone()
+                Xkept = X[:, kept[:m]]
+                model_kept.train(Xkept, Y)
+                coefci = Perc(model_kept, Xkept, Y, ["model.coef_"], bootnum=bootnum).run()["model.coef_"]
+                crosszero = np.flatnonzero((coefci[:, 0] <= 0) & (coefci[:, 1] >= 0))
+                if len(crosszero) == 0:
+                    break
+                remove = crosszero[np.lexsort((kept[crosszero], vip[crosszero]))[:nremove]]
+
+            # Downdate the centered gram matrix with the removed columns
+            X0remove = X0[:, remove]
+            gram = gram - np.matmul(X0remove, X0remove.T)
+
+            # Move the remaining columns after the new m into the removed columns before it
+            m = m - len(remove)
+            holes = remove[remove < m]
+            fill = np.setdiff1d(np.arange(m, m + len(remove)), remove)
+            X0[:, holes] = X0[:, fill]
+            kept[holes] = kept[fill]
+
+        rfe_table = pd.DataFrame(rfe_list)
+        return rfe_table
+
+    def _as_dtype(self, X):
+        """Converts X to a numpy array (or CSR/CSC matrix if X is sparse) of the selected dtype (float64 if dtype is None). No copy is made if X already has that dtype."""
+        dtype = np.float64 if self.dtype is None else self.dtype
+        if scipy.sparse.issparse(X):
+            if X.format not in ["csr", "csc"]:
+                X = scipy.sparse.csr_matrix(X)
+            return X.astype(dtype, copy=False)
+        return np.asarray(X, dtype=dtype)
+
+    def _select_solver(self, X, ncomp):
+        """Returns the solver used for X and ncomp components: 'implicit' for scipy.sparse X, else solver, or if solver is 'auto', 'kernel' for wide X with n_components >= 2 + n_samples / 30, else 'simpls'."""
+        if scipy.sparse.issparse(X):
+            return "implicit"
+        if self.solver != "auto":
+            return self.solver
+        # Forming X0 * X0' costs n^2 * p (plus two passes over X0 to map the weights and loadings back), and each SIMPLS component costs two memory bound passes over X0, so the kernel form only pays off once ncomp grows with n (the crossover is at ncomp of about 3, 7 and 12 for 30, 100 and 300 samples with 10k to 50k peaks, see benchmarks/benchmark_simpls.py)
+        n, dx = X.shape
+        if dx > n and ncomp >= 2 + n / 30:
+            return "kernel"
+        return "simpls"
+
+    def _solve(self, X, Y, ncomp, sample_weight=None):
+        """Runs the solver selected by _select_solver."""
+        solver = self._select_solver(X, ncomp)
+        if solver == "implicit":
+            return self.pls_simpls_implicit(X, Y, ncomp=ncomp, sample_weight=sample_weight)
+        if solver == "kernel":
+            return self.pls_kernel(X, Y, ncomp=ncomp, sample_weight=sample_weight)
+        else:
+            return self.pls_simpls(X, Y, ncomp=ncomp, sample_weight=sample_weight)
+
     def plot_projections(self, label=None, size=12):
         """ Plots latent variables projections against each other in a Grid format.
 
@@ -145,7 +871,7 @@ class PLS_SIMPLS(BaseModel):
             # Distribution plot
             dist_bokeh = distribution(self.Y_pred, group=self.Y, kde=True, title="", xlabel="Predicted Score", ylabel="p.d.f.", width=320, height=315)
             # ROC plot
-            fpr, tpr, tpr_ci = roc_calculate(self.Y, self.Y_pred, bootnum=100)
+            fpr, tpr, tpr_ci = self._projection_rocs()[0]
             roc_bokeh = roc_plot(fpr, tpr, tpr_ci, width=310, height=315)
             # Score plot
             y = self.model.x_scores_[:, 0].tolist()
@@ -172,12 +898,8 @@ class PLS_SIMPLS(BaseModel):
             # Create empty grid
             grid = np.full((num_x_scores, num_x_scores), None)
 
-            # Append each scoreplot
+            # Append each scoreplot (scatter copies label and group, so they are not copied here)
             for i in range(len(comb_x_scores)):
-                # Make a copy (as it overwrites the input label/group)
-                label_copy = deepcopy(label)
-                group_copy = self.Y.copy()
-
                 # Scatterplot
                 x, y = comb_x_scores[i]
                 xlabel = "LV {} ({:0.1f}%)".format(x + 1, self.model.pctvar_[x])
@@ -189,23 +911,18 @@ class PLS_SIMPLS(BaseModel):
                 new_range_max = max_range + 0.05 * max_range
                 new_range = (new_range_min, new_range_max)
 
-                grid[y, x] = scatter(self.model.x_scores_[:, x].tolist(), self.model.x_scores_[:, y].tolist(), label=label_copy, group=group_copy, title="", xlabel=xlabel, ylabel=ylabel, width=width_height, height=width_height, legend=False, size=circle_size_scoreplot, label_font_size=label_font, hover_xy=False, xrange=new_range, yrange=new_range, gradient=gradient)
+                grid[y, x] = scatter(self.model.x_scores_[:, x].tolist(), self.model.x_scores_[:, y].tolist(), label=label, group=self.Y, title="", xlabel=xlabel, ylabel=ylabel, width=width_height, height=width_height, legend=False, size=circle_size_scoreplot, label_font_size=label_font, hover_xy=False, xrange=new_range, yrange=new_range, gradient=gradient)
 
             # Append each distribution curve
             for i in range(num_x_scores):
                 xlabel = "LV {} ({:0.1f}%)".format(i + 1, self.model.pctvar_[i])
-                grid[i, i] = distribution(self.model.x_scores_[:, i], group=group_copy, kde=True, title="", xlabel=xlabel, ylabel="density", width=width_height, height=width_height, label_font_size=label_font)
+                grid[i, i] = distribution(self.model.x_scores_[:, i], group=self.Y, kde=True, title="", xlabel=xlabel, ylabel="density", width=width_height, height=width_height, label_font_size=label_font)
 
-            # Append each roc curve
+            # Append each roc curve (calculated once for every pair and cached)
+            rocs = self._projection_rocs()
             for i in range(len(comb_x_scores)):
                 x, y = comb_x_scores[i]
-
-                # Get the optimal combination of x_scores based on rotation of y_loadings_
-                theta = math.atan(self.model.y_loadings_[0][y] / self.model.y_loadings_[0][x])
-                x_rotate = self.model.x_scores_[:, x] * math.cos(theta) + self.model.x_scores_[:, y] * math.sin(theta)
-
-                # ROC Plot with x_rotate
-                fpr, tpr, tpr_ci = roc_calculate(group_copy, x_rotate, bootnum=100)
+                fpr, tpr, tpr_ci = rocs[i]
                 grid[x, y] = roc_plot(fpr, tpr, tpr_ci, width=width_height, height=width_height, xlabel="1-Specificity (LV{}/LV{})".format(x + 1, y + 1), ylabel="Sensitivity (LV{}/LV{})".format(x + 1, y + 1), legend=False, label_font_size=label_font)
 
             # Bokeh grid
@@ -214,85 +931,525 @@ class PLS_SIMPLS(BaseModel):
         output_notebook()
         show(fig)
 
-    @staticmethod
-    def pls_simpls(X, Y, ncomp=2):
-        """PLS SIMPLS method. Refer to https://doi.org/10.1016/0169-7439(93)85002-X"""
+    def _projection_rocs(self):
+        """Returns the ROC curve (fpr, tpr, tpr_ci) of the rotated x_scores_ for every pair of latent variables (in the order of combinations), or of Y_pred if there is 1 latent variable. The rotated scores of all pairs are calculated in one step, the ROC bootstraps share their resamples (see roc_calculate_many), and the result is cached on self.model (so plot_projections can be re-rendered with a different label or size without recalculating it)."""
+        if self.model._projection_rocs is None:
+            x_scores = self.model.x_scores_
+            if x_scores.shape[1] == 1:
+                scores = np.reshape(self.Y_pred, (-1, 1))
+            else:
+                # Get the optimal combination of x_scores for each pair based on rotation of y_loadings_
+                pairs = np.array(list(combinations(range(x_scores.shape[1]), 2)))
+                y_loadings = self.model.y_loadings_[0]
+                theta = np.arctan(y_loadings[pairs[:, 1]] / y_loadings[pairs[:, 0]])
+                scores = x_scores[:, pairs[:, 0]] * np.cos(theta) + x_scores[:, pairs[:, 1]] * np.sin(theta)
+            self.model._projection_rocs = roc_calculate_many(self.Y, scores, bootnum=100)
+        return self.model._projection_rocs
 
-        # Error check that X and Y match
-        n, dx = X.shape
-        ny = len(Y)
-        if ny != n:
-            raise ValueError("X and Y must have the same number of rows")
+    @staticmethod
+    def pls_simpls(X, Y, ncomp=2, sample_weight=None):
+        """PLS SIMPLS method. Refer to https://doi.org/10.1016/0169-7439(93)85002-X
 
-        # Error check for ncomp < maxncomp
-        maxncomp = min(n - 1, dx)
-        if ncomp > maxncomp:
-            raise ValueError("ncomp must be less than or equal to {} for these data.".format(maxncomp))
+        If sample_weight is given, the weighted means are used for centering and the rows of X0 and Y0 are scaled by sqrt(sample_weight) (without copying X0).
+        """
+        dtype, Y = solver_input(X, Y, ncomp)
 
         # Center both predictors and response
-        meanX = np.mean(X, axis=0)
-        meanY = np.mean(Y, axis=0)
+        if sample_weight is None:
+            meanX = np.mean(X, axis=0)
+            meanY = np.mean(Y, axis=0)
+            sqrtw = 1
+        else:
+            sample_weight = np.asarray(sample_weight, dtype=dtype)
+            meanX = np.matmul(sample_weight, X) / np.sum(sample_weight)
+            meanY = np.dot(sample_weight, Y) / np.sum(sample_weight)
+            sqrtw = np.sqrt(sample_weight)
         X0 = X - meanX
-        Y0 = Y - meanY
-        n, dx = X0.shape
-        dy = 1
-
-        # Empty arrays for loadings, scores, and weights
-        Xloadings = np.zeros([dx, ncomp])
-        Yloadings = np.zeros([dy, ncomp])
-        Xscores = np.zeros([n, ncomp])
-        Yscores = np.zeros([n, ncomp])
-        Weights = np.zeros([dx, ncomp])
-
-        # An orthonormal basis for the X loadings
-        V = np.zeros([dx, ncomp])
-        Cov = np.matmul(X0.T, Y0)
-        Cov = Cov.reshape(len(Cov), 1)
-
-        for i in range(ncomp):
-            # Find unit length ti=X0*ri and ui=Y0*ci whose covariance, ri'*X0'*Y0*ci, is jointly maximized, subject to ti'*tj=0 for j=1:(i-1).
-            ri, si, ci = np.linalg.svd(Cov)
-            ri = ri[:, 0]
-            si = si[0]
-            ci = ci[0]
-            ti = np.matmul(X0, ri)
+        Y0 = (Y - meanY) * sqrtw
+
+        def project(ri):
+            ti = np.matmul(X0, ri) * sqrtw
             normti = np.linalg.norm(ti)
             ti = ti / normti
-            qi = si * ci / normti
-
-            Xloadings[:, i] = np.matmul(X0.T, ti)
-            Yloadings[:, i] = qi
-            Xscores[:, i] = ti
-            Yscores[:, i] = (Y0 * qi).tolist()
-            Weights[:, i] = ri / normti  #
-
-            # Update the orthonormal basis with modified Gram Schmidt
-            vi = Xloadings[:, i]
-            for repeat in range(2):
-                for j in range(i):
-                    vj = V[:, j]
-                    vi = vi - np.matmul(vj.T, vi) * vj
-
-            vi = vi / np.linalg.norm(vi)
-            V[:, i] = vi
-
-            # Deflate Cov
-            vim = vi * np.matmul(vi.T, Cov)
-            Cov = Cov - vim.reshape(len(vim), 1)
-            Vi = V[:, 0 : i + 1]
-            Vim = np.dot(Vi, np.matmul(Vi.T, Cov)).flatten()
-            Cov = Cov - Vim.reshape(len(Vim), 1)
-
-        # Use modified Gram-Schmidt, repeated twice.
-        for i in range(ncomp):
-            ui = Yscores[:, i]
-            for repeat in range(2):
-                for j in range(i):
-                    tj = Xscores[:, j]
-                    ui = ui - np.dot(np.matmul(tj.T, ui), tj)
-            Yscores[:, i] = ui
+            return ti, normti, np.matmul(X0.T, ti * sqrtw)
+
+        Xscores, Xloadings, Yloadings, Weights = simpls_components(np.matmul(X0.T, Y0 * sqrtw), ncomp, project)
+        Yloadings = Yloadings[np.newaxis, :]
+        Yscores = orthogonalize_scores(np.outer(Y0, Yloadings), Xscores)
 
         Beta = np.matmul(Weights, Yloadings.T)
         Beta_add = meanY - np.dot(meanX, Beta)
         Beta = np.insert(Beta, 0, Beta_add)
         return Xscores, Yscores, Xloadings, Yloadings, Weights, Beta
+
+    @staticmethod
+    def pls_simpls_implicit(X, Y, ncomp=2, meanX=None, sample_weight=None):
+        """PLS SIMPLS method with implicit centering i.e. X0 * r = X * r - meanX * r and X0' * t = X' * t - meanX * sum(t). The centered matrix X0 is never formed, so scipy.sparse X stays sparse (any X that supports X @ v and X.T @ v can be used e.g. block_operator, with meanX provided). If sample_weight is given, the rows are weighted as in pls_simpls."""
+        dtype, Y = solver_input(X, Y, ncomp)
+
+        # Center the response (X is centered implicitly)
+        if sample_weight is None:
+            if meanX is None:
+                meanX = np.asarray(X.mean(axis=0), dtype=dtype).ravel()
+            meanY = np.mean(Y, axis=0)
+            sqrtw = 1
+        else:
+            sample_weight = np.asarray(sample_weight, dtype=dtype)
+            if meanX is None:
+                meanX = np.asarray(X.T @ sample_weight, dtype=dtype).ravel() / np.sum(sample_weight)
+            meanY = np.dot(sample_weight, Y) / np.sum(sample_weight)
+            sqrtw = np.sqrt(sample_weight)
+        Y0 = (Y - meanY) * sqrtw
+
+        def project(ri):
+            ti = (X @ ri - np.dot(meanX, ri)) * sqrtw
+            normti = np.linalg.norm(ti)
+            ti = ti / normti
+            return ti, normti, X.T @ (ti * sqrtw) - meanX * np.sum(ti * sqrtw)
+
+        # X0' * Y0 = X' * Y0 as the weighted Y0 sums to zero
+        Xscores, Xloadings, Yloadings, Weights = simpls_components(X.T @ (Y0 * sqrtw), ncomp, project)
+        Yloadings = Yloadings[np.newaxis, :]
+        Yscores = orthogonalize_scores(np.outer(Y0, Yloadings), Xscores)
+
+        Beta = np.matmul(Weights, Yloadings.T)
+        Beta_add = meanY - np.dot(meanX, Beta)
+        Beta = np.insert(Beta, 0, Beta_add)
+        return Xscores, Yscores, Xloadings, Yloadings, Weights, Beta
+
+    @staticmethod
+    def pls_kernel(X, Y, ncomp=2, gram=None, sample_weight=None, centered=False):
+        """PLS SIMPLS method in kernel form. Every vector in feature space is represented by its coefficients on the rows of X0 (e.g. ri = X0' * ai), so the loop only uses the n x n matrix X0 * X0'. Feature space is used once at the end for the weights and loadings.
+
+        gram can be a precomputed X * X' (or X0 * X0') for these rows, e.g. downdated by rfe. It is double-centered, so a centered gram should be passed where possible (the uncentered gram loses precision when the column means are large). If centered is True, X is already centered (X0 is not copied, and the intercept is for the centered X) and gram is X0 * X0' (it is not double-centered). If sample_weight is given, the rows are weighted as in pls_simpls (the weighted kernel is S * X0 * X0' * S with S = diag(sqrt(sample_weight))).
+        """
+        dtype, Y = solver_input(X, Y, ncomp)
+        n, dx = X.shape
+
+        # Center X and the response (weighted means if sample_weight is given)
+        if sample_weight is None:
+            meanX = np.zeros(dx, dtype=dtype) if centered else np.mean(X, axis=0)
+            meanY = np.mean(Y, axis=0)
+            sqrtw = 1
+        else:
+            sample_weight = np.asarray(sample_weight, dtype=dtype)
+            sumw = np.sum(sample_weight)
+            meanX = np.zeros(dx, dtype=dtype) if centered else np.matmul(sample_weight, X) / sumw
+            meanY = np.dot(sample_weight, Y) / sumw
+            sqrtw = np.sqrt(sample_weight)
+        X0 = X if centered else X - meanX
+
+        # The kernel X0 * X0' is formed from the centered X (forming X * X' and centering it afterwards loses precision when the column means are large). A gram passed in by the caller is double-centered (unless centered is True).
+        if gram is None:
+            K = np.matmul(X0, X0.T)
+        elif gram.shape != (n, n):
+            raise ValueError("gram must have shape ({0}, {0})".format(n))
+        elif centered:
+            K = gram
+        elif sample_weight is None:
+            K = double_center(gram)
+        else:
+            meanG = np.matmul(sample_weight, gram) / sumw
+            K = gram - meanG[:, np.newaxis] - meanG[np.newaxis, :] + np.dot(sample_weight, meanG) / sumw
+        if sample_weight is not None:
+            K = K * np.outer(sqrtw, sqrtw)
+        Y0 = (Y - meanY) * sqrtw
+
+        Xscores, Yloadings, Rcoef = kernel_components(K, Y0, ncomp)
+        Yloadings = Yloadings[np.newaxis, :]
+        Yscores = orthogonalize_scores(np.outer(Y0, Yloadings), Xscores)
+
+        # Map back to feature space
+        if sample_weight is not None:
+            Rcoef = Rcoef * sqrtw[:, np.newaxis]
+        Weights = np.matmul(X0.T, Rcoef)
+        Xscoresw = Xscores if sample_weight is None else Xscores * sqrtw[:, np.newaxis]
+        Xloadings = np.matmul(X0.T, Xscoresw)
+
+        Beta = np.matmul(Weights, Yloadings.T)
+        Beta_add = meanY - np.dot(meanX, Beta)
+        Beta = np.insert(Beta, 0, Beta_add)
+        return Xscores, Yscores, Xloadings, Yloadings, Weights, Beta
+
+    @staticmethod
+    def pls_simpls_cov(XtX, XtY, meanX, meanY, ncomp=2):
+        """PLS SIMPLS method using only the centered cross-products XtX = X0' * X0 and XtY = X0' * Y0 (and the means for the intercept). X0 * ri is never formed, as ||X0 * ri||^2 = ri' * XtX * ri and the X loading X0' * ti = XtX * ri / ||X0 * ri||. XtX is only multiplied by vectors, so it can be an array or a LinearOperator (e.g. for a factor of XtX). The scores are not returned."""
+        dtype = np.result_type(XtX.dtype, np.float32)
+
+        def project(ri):
+            XtXri = XtX @ ri
+            normti = np.sqrt(np.dot(ri, XtXri))
+            return None, normti, XtXri / normti
+
+        Xscores, Xloadings, Yloadings, Weights = simpls_components(np.asarray(XtY, dtype=dtype), ncomp, project)
+        Yloadings = Yloadings[np.newaxis, :]
+
+        Beta = np.matmul(Weights, Yloadings.T)
+        Beta_add = meanY - np.dot(meanX, Beta)
+        Beta = np.insert(Beta, 0, Beta_add)
+        return Xloadings, Yloadings, Weights, Beta
+
+    @staticmethod
+    def pls_simpls_folds(X, Y, testidx, ncomp=2):
+        """PLS SIMPLS method for cross-validation folds. The centered cross-products of the full data are calculated once and downdated with the held-out rows of each fold, so the component loop never multiplies the full X (or the held-out rows). If n_features <= n_samples, X0' * X0 and X0' * Y0 are downdated and each fold uses pls_simpls_cov. Otherwise the gram X0 * X0' is calculated once, each fold uses the kernel form (see pls_kernel) on its training block, and the weights of all folds are mapped back to feature space with one product. scipy.sparse X is centered implicitly. Returns the Beta path for each fold."""
+        dtype, Y = solver_input(X, Y, ncomp)
+        n, dx = X.shape
+
+        # Center both predictors and response (scipy.sparse X is centered implicitly by subtracting offsetX)
+        meanX = np.asarray(X.mean(axis=0), dtype=dtype).ravel()
+        meanY = np.mean(Y)
+        if scipy.sparse.issparse(X):
+            X0 = X
+            offsetX = meanX
+        else:
+            X0 = X - meanX
+            offsetX = np.zeros(dx, dtype=dtype)
+        Y0 = Y - meanY
+        # Column sums of the centered X (zero up to rounding)
+        sumX0 = np.asarray(X0.sum(axis=0)).ravel() - n * offsetX
+
+        # Full data cross-products
+        kernel = dx > n
+        if kernel:
+            gram = X0 @ X0.T
+            gram = gram.toarray() if scipy.sparse.issparse(gram) else gram
+            Acoef = np.zeros([n, len(testidx), ncomp], dtype=dtype)
+        else:
+            XtX = X0.T @ X0
+            XtX = XtX.toarray() if scipy.sparse.issparse(XtX) else XtX
+            XtX = XtX - n * np.outer(offsetX, offsetX)
+            XtY = X0.T @ Y0
+
+        meanX_folds = []
+        meanY_folds = []
+        beta_folds = []
+        for f, test in enumerate(testidx):
+            # Error check for ncomp < maxncomp
+            ntrain = n - len(test)
+            maxncomp = min(ntrain - 1, dx)
+            if ncomp > maxncomp:
+                raise ValueError("ncomp must be less than or equal to {} for these data.".format(maxncomp))
+
+            # Shift of the training means from the full data means (d for X and e for Y)
+            Xtest0 = X0[test, :]
+            Xtest0 = Xtest0.toarray() - offsetX if scipy.sparse.issparse(Xtest0) else Xtest0
+            d = (sumX0 - np.sum(Xtest0, axis=0)) / ntrain
+            e = -np.sum(Y0[test]) / ntrain
+            meanX_folds.append(meanX + d)
+            meanY_folds.append(meanY + e)
+
+            if kernel:
+                # The double-centered training block of the gram is the kernel of the training rows centered by their own means
+                train = np.setdiff1d(np.arange(n), test)
+                K = double_center(gram[np.ix_(train, train)])
+                Xscores, Yloadings, Rcoef = kernel_components(K, Y0[train] - e, ncomp)
+                Acoef[train, f, :] = np.cumsum(Rcoef * Yloadings, axis=1)
+            else:
+                # Sum over the training rows of (x - meanX - d)(x - meanX - d)', where the training rows of x - meanX sum to ntrain * d
+                XtXf = XtX - np.matmul(Xtest0.T, Xtest0) - ntrain * np.outer(d, d)
+                XtYf = XtY - np.matmul(Xtest0.T, Y0[test]) - ntrain * d * e
+                Xloadings, Yloadings, Weights, Beta = PLS_SIMPLS.pls_simpls_cov(XtXf, XtYf, meanX + d, meanY + e, ncomp)
+                beta_folds.append(np.cumsum(Weights * Yloadings, axis=1))
+
+        # The weights of a fold are X0f' * a = X0' * a - d * sum(a) for the training rows centered by their own means X0f = X0[train] - d
+        if kernel:
+            Acoef = np.reshape(Acoef, (n, -1))
+            sumA = np.sum(Acoef, axis=0)
+            beta_folds = np.reshape(X0.T @ Acoef - np.outer(offsetX, sumA), (dx, len(testidx), ncomp))
+            sumA = np.reshape(sumA, (len(testidx), ncomp))
+            beta_folds = [beta_folds[:, f, :] - np.outer(meanX_folds[f] - meanX, sumA[f]) for f in range(len(testidx))]
+
+        beta_folds = [np.vstack([meanY_f - np.matmul(meanX_f, beta_path), beta_path]) for meanX_f, meanY_f, beta_path in zip(meanX_folds, meanY_folds, beta_folds)]
+        return np.array(beta_folds)
+
+    @staticmethod
+    def pls_simpls_many(X, Y, ncomp=2):
+        """PLS SIMPLS method applied independently to each column of Y, with the cross-products for all responses calculated at once. Returns Xscores (n x ncomp x m), Yloadings (ncomp x m), Weights (dx x ncomp x m) and Beta (dx + 1 x m)."""
+        dtype, Y = solver_input(X, Y, ncomp)
+
+        # Center both predictors and responses (scipy.sparse X is centered implicitly by subtracting offsetX)
+        meanX = np.asarray(X.mean(axis=0), dtype=dtype).ravel()
+        meanY = np.mean(Y, axis=0)
+        if scipy.sparse.issparse(X):
+            X0 = X
+            offsetX = meanX
+        else:
+            X0 = X - meanX
+            offsetX = np.zeros(X.shape[1], dtype=dtype)
+        Y0 = Y - meanY
+
+        def project(ri):
+            ti = X0 @ ri - np.matmul(offsetX, ri)
+            normti = np.linalg.norm(ti, axis=0)
+            ti = ti / normti
+            return ti, normti, X0.T @ ti - np.outer(offsetX, np.sum(ti, axis=0))
+
+        # Every response at once (the columns of Cov)
+        Xscores, Xloadings, Yloadings, Weights = simpls_components(X0.T @ Y0, ncomp, project)
+
+        Beta = np.einsum("dim,im->dm", Weights, Yloadings)
+        Beta_add = meanY - np.matmul(meanX, Beta)
+        Beta = np.vstack([Beta_add, Beta])
+        return Xscores, Yloadings, Weights, Beta
+
+
+class PLSModel(object):
+    """Stores the attributes of a fitted PLS model. vip_ and pctvar_ are calculated when first accessed (resampling loops often only use beta_ or coef_), and can also be set directly (e.g. by load)."""
+
+    def __init__(self):
+        self._vip = None
+        self._pctvar = None
+        self._sumsqX0 = None
+        self._X = None
+        self._sample_weight = None
+        self._projection_rocs = None  # cached by PLS_SIMPLS.plot_projections
+
+    @property
+    def vip_(self):
+        if self._vip is None:
+            W0 = self.x_weights_ / np.sqrt(np.sum(self.x_weights_ ** 2, axis=0))
+            sumSq = np.sum(self.x_scores_ ** 2, axis=0) * np.sum(self.y_loadings_ ** 2, axis=0)
+            self._vip = np.sqrt(len(self.x_loadings_) * np.sum(sumSq * W0 ** 2, axis=1) / np.sum(sumSq, axis=0))
+        return self._vip
+
+    @vip_.setter
+    def vip_(self, value):
+        self._vip = value
+
+    @property
+    def pctvar_(self):
+        if self._pctvar is None:
+            if self._sumsqX0 is None:
+                self._sumsqX0 = centered_sumsq(self._X, self.x_mean_, self._sample_weight)
+                self._X = None
+                self._sample_weight = None
+            self._pctvar = np.sum(abs(self.x_loadings_) ** 2, axis=0) / self._sumsqX0 * 100
+        return self._pctvar
+
+    @pctvar_.setter
+    def pctvar_(self, value):
+        self._pctvar = value
+
+
+class FrozenScorer(object):
+    """ Scores unscaled X with the coefficients and intercept of a PLS_SIMPLS model that has the scaling folded in (see PLS_SIMPLS.freeze). The score is X * coef_ + intercept_, calculated without copying X.
+
+    Parameters
+    ----------
+    coef : array-like, shape = [n_features]
+        Coefficients for unscaled X.
+
+    intercept : number
+        Intercept for unscaled X.
+
+    feature_index : dict or None, (default None)
+        Peak name -> index of coef. If given, DataFrame columns are matched to the peaks by name.
+    """
+
+    def __init__(self, coef, intercept, feature_index=None):
+        self.coef_ = np.ascontiguousarray(coef)
+        self.intercept_ = intercept
+        self.feature_index = feature_index
+        self._aligned_coef_cache = {}
+
+    def test(self, X):
+        """Calculate and return Y predicted value for unscaled X (array-like, scipy.sparse or np.memmap, shape = [n_samples, n_features])."""
+        coef = self.coef_
+        if isinstance(X, pd.DataFrame):
+            if self.feature_index is not None:
+                coef = self._aligned_coef(tuple(X.columns))
+            X = X.values
+        y_pred_test = X @ coef
+        y_pred_test += self.intercept_
+        return y_pred_test
+
+    def _aligned_coef(self, columns):
+        """Returns coef_ in the order of columns (cached for each column order, see aligned_coef)."""
+        if columns not in self._aligned_coef_cache:
+            self._aligned_coef_cache[columns] = aligned_coef(self.coef_, self.feature_index, columns)
+        return self._aligned_coef_cache[columns]
+
+
+def aligned_coef(coef, feature_index, columns):
+    """Returns coef (or the rows of coef, e.g. one column for each bootstrap model) in the order of columns using the peak name -> index map feature_index (columns not in feature_index get a coefficient of 0). Raises a ValueError if the column names are not unique, or a peak in feature_index is not in columns."""
+    # Build the set of column names once (membership tests are O(1), so the check is O(n_features))
+    columnset = set(columns)
+    if len(columnset) != len(columns):
+        raise ValueError("Column names in X should be unique.")
+    missing = [i for i in feature_index if i not in columnset]
+    if len(missing) > 0:
+        raise ValueError("X does not contain {} of the peaks used in train e.g. {}".format(len(missing), missing[:5]))
+    idx = np.array([feature_index.get(i, -1) for i in columns], dtype=int)
+    coef_aligned = np.zeros((len(idx),) + coef.shape[1:], dtype=coef.dtype)
+    coef_aligned[idx >= 0] = coef[idx[idx >= 0]]
+    return coef_aligned
+
+
+def solver_input(X, Y, ncomp):
+    """Checks that X and Y have the same number of rows and ncomp is at most min(n_samples - 1, n_features), and returns the floating point type of the calculations (the type of X, so float32 stays float32) and Y as that type."""
+    n, dx = X.shape
+    if len(Y) != n:
+        raise ValueError("X and Y must have the same number of rows")
+    dtype = np.result_type(X.dtype, np.float32)
+    maxncomp = min(n - 1, dx)
+    if ncomp > maxncomp:
+        raise ValueError("ncomp must be less than or equal to {} for these data.".format(maxncomp))
+    return dtype, np.asarray(Y, dtype=dtype)
+
+
+def simpls_components(Cov, ncomp, project, metric=None):
+    """Runs the SIMPLS component loop (weights, Gram-Schmidt update of the orthonormal basis for the X loadings, and deflation of Cov) and returns Xscores, Xloadings, Yloadings and Weights. Every solver uses this loop, and only differs in how it multiplies by X0.
+
+    Cov is the covariance vector X0' * Y0, or a matrix with a column for each response (each is fitted independently, and the response is the last axis of the results). project(ri) returns the scores ti = X0 * ri of unit length (None if the solver does not form them), ||X0 * ri|| and the X loadings X0' * ti, for the weights ri. metric(v) multiplies v by the inner product matrix of the coordinates: None in feature space, or K = X0 * X0' in kernel form, where a vector X0' * a is represented by its row coefficients a.
+    """
+    single = Cov.ndim == 1
+    dx = len(Cov)
+    dtype = Cov.dtype
+
+    # Each response is a stack of column vectors (m x dx x 1), so the projections onto the basis are (batched) matrix products
+    def stacked(v):
+        return np.ascontiguousarray(np.reshape(v, (dx, -1)).T[:, :, np.newaxis])
+
+    def columns(v):
+        return v[0, :, 0] if single else v[:, :, 0].T
+
+    Cov = stacked(Cov)
+    m = len(Cov)
+    Xloadings = np.zeros([m, dx, ncomp], dtype=dtype)
+    Yloadings = np.zeros([m, ncomp], dtype=dtype)
+    Weights = np.zeros([m, dx, ncomp], dtype=dtype)
+    Xscores = []
+
+    # An orthonormal basis for the X loadings, and metric times the basis (so the projection of v onto the basis is V * MV' * v)
+    V = np.zeros([m, dx, ncomp], dtype=dtype)
+    MV = V if metric is None else np.zeros([m, dx, ncomp], dtype=dtype)
+
+    for i in range(ncomp):
+        # Find unit length ti=X0*ri and ui=Y0*ci whose covariance, ri'*X0'*Y0*ci, is jointly maximized, subject to ti'*tj=0 for j=1:(i-1).
+        # For a single response, the first singular triplet of the dx x 1 matrix Cov is (Cov / ||Cov||, ||Cov||, 1), so a full SVD (with a dx x dx U) is not needed.
+        Covi = columns(Cov)
+        if metric is None:
+            si = np.linalg.norm(Covi, axis=0)
+        else:
+            si = np.sqrt(np.sum(Covi * metric(Covi), axis=0))
+        ri = Covi / si
+        ti, normti, loading = project(ri)
+
+        vi = stacked(loading)
+        Xloadings[:, :, i] = vi[:, :, 0]
+        Yloadings[:, i] = si / normti
+        Xscores.append(ti)
+        Weights[:, :, i] = stacked(ri / normti)[:, :, 0]
+
+        # Update the orthonormal basis with Gram Schmidt (repeated twice), projecting onto all previous columns of V at once
+        for repeat in range(2):
+            vi = vi - np.matmul(V[:, :, :i], np.matmul(np.swapaxes(MV[:, :, :i], 1, 2), vi))
+        if metric is None:
+            Mvi = vi
+            normvi = np.linalg.norm(vi, axis=1, keepdims=True)
+        else:
+            Mvi = stacked(metric(columns(vi)))
+            normvi = np.sqrt(np.sum(vi * Mvi, axis=1, keepdims=True))
+        V[:, :, i : i + 1] = vi / normvi
+        if metric is not None:
+            MV[:, :, i : i + 1] = Mvi / normvi
+
+        # Deflate Cov
+        Cov = Cov - V[:, :, i : i + 1] * np.matmul(np.swapaxes(MV[:, :, i : i + 1], 1, 2), Cov)
+        Cov = Cov - np.matmul(V[:, :, : i + 1], np.matmul(np.swapaxes(MV[:, :, : i + 1], 1, 2), Cov))
+
+    # Results with the component as the second axis (and the response as the last axis if Cov is a matrix)
+    Xscores = None if Xscores[0] is None else np.stack(Xscores, axis=1)
+    if single:
+        return Xscores, Xloadings[0], Yloadings[0], Weights[0]
+    return Xscores, np.moveaxis(Xloadings, 0, 2), Yloadings.T, np.moveaxis(Weights, 0, 2)
+
+
+def kernel_components(K, Y0, ncomp):
+    """Runs simpls_components in kernel form (see PLS_SIMPLS.pls_kernel) for the centered kernel K = X0 * X0' and the centered response Y0. Returns Xscores, Yloadings and the row coefficients Rcoef of the weights (Weights = X0' * Rcoef)."""
+
+    def project(ri):
+        ti = np.matmul(K, ri)
+        normti = np.linalg.norm(ti)
+        ti = ti / normti
+        return ti, normti, ti
+
+    # X0' * Y0 is the covariance vector, and the X loading X0' * ti has the row coefficients ti
+    Xscores, Lcoef, Yloadings, Rcoef = simpls_components(Y0, ncomp, project, metric=lambda v: np.matmul(K, v))
+    return Xscores, Yloadings, Rcoef
+
+
+def double_center(gram):
+    """Returns the gram matrix X * X' of the rows centered by their mean i.e. (X - meanX) * (X - meanX)', from the gram of X (or of X shifted by any constant row)."""
+    meanG = np.mean(gram, axis=0)
+    return gram - meanG[:, np.newaxis] - meanG[np.newaxis, :] + np.mean(meanG)
+
+
+def centered_sumsq(X, meanX, sample_weight=None):
+    """Returns the sum of squares of the centered X, weighted by sample_weight if given (for scipy.sparse X, without forming the centered matrix)."""
+    if sample_weight is None:
+        if scipy.sparse.issparse(X):
+            return X.multiply(X).sum() - X.shape[0] * np.dot(meanX, meanX)
+        return np.sum((X - meanX) ** 2)
+    if scipy.sparse.issparse(X):
+        return np.sum(X.multiply(X).T @ sample_weight) - np.sum(sample_weight) * np.dot(meanX, meanX)
+    return np.sum(np.matmul(sample_weight, (X - meanX) ** 2))
+
+
+def orthogonalize_scores(Yscores, Xscores):
+    """Returns Yscores with each column i made orthogonal to the columns 0 to i-1 of Xscores (which are orthonormal). Gram-Schmidt is repeated twice, and all columns are updated in one matrix product per repeat."""
+    for repeat in range(2):
+        Yscores = Yscores - np.matmul(Xscores, np.triu(np.matmul(Xscores.T, Yscores), k=1))
+    return Yscores
+
+
+def block_operator(X, block_size=1000, dtype=None):
+    """Returns a LinearOperator for X (e.g. an np.memmap) that calculates X @ v and X.T @ u by reading blocks of block_size rows, so only one block is held in memory at a time."""
+    n, dx = X.shape
+    if dtype is None:
+        dtype = np.result_type(X.dtype, np.float32)
+
+    def matmat(v):
+        out = np.empty((n,) + v.shape[1:], dtype=np.result_type(dtype, v.dtype))
+        for start in range(0, n, block_size):
+            block = np.asarray(X[start : start + block_size], dtype=dtype)
+            out[start : start + len(block)] = block @ v
+        return out
+
+    def rmatmat(u):
+        out = np.zeros((dx,) + u.shape[1:], dtype=np.result_type(dtype, u.dtype))
+        for start in range(0, n, block_size):
+            block = np.asarray(X[start : start + block_size], dtype=dtype)
+            out += block.T @ u[start : start + len(block)]
+        return out
+
+    return LinearOperator((n, dx), matvec=matmat, rmatvec=rmatmat, matmat=matmat, rmatmat=rmatmat, dtype=dtype)
+
+
+def block_stats(X, block_size=1000, sample_weight=None):
+    """Returns the column means and the sum of squares of the centered X (weighted by sample_weight, if given), calculated in one pass over blocks of block_size rows (block statistics are merged with the pairwise update of Chan et al.)."""
+    n, dx = X.shape
+    count = 0
+    meanX = np.zeros(dx)
+    M2 = np.zeros(dx)
+    for start in range(0, n, block_size):
+        block = np.asarray(X[start : start + block_size], dtype=np.float64)
+        if np.isnan(block).any():
+            raise ValueError("NaNs found in X.")
+        if sample_weight is None:
+            nblock = len(block)
+            meanblock = np.mean(block, axis=0)
+            M2block = np.sum((block - meanblock) ** 2, axis=0)
+        else:
+            wblock = np.asarray(sample_weight[start : start + block_size], dtype=np.float64)
+            nblock = np.sum(wblock)
+            if nblock == 0:
+                continue
+            meanblock = np.matmul(wblock, block) / nblock
+            M2block = np.matmul(wblock, (block - meanblock) ** 2)
+        delta = meanblock - meanX
+        total = count + nblock
+        meanX = meanX + delta * nblock / total
+        M2 = M2 + M2block + delta ** 2 * count * nblock / total
+        count = total
+    return meanX, np.sum(M2)
@@ -1,5 +1,7 @@
 from .PLS_SIMPLS import PLS_SIMPLS
+from .PLS_OneVsRest import PLS_OneVsRest
 
 __all__ = [
     "PLS_SIMPLS",
+    "PLS_OneVsRest",
 ]
@@ -2,8 +2,8 @@ from .boxplot import boxplot
 from .distribution import distribution
 from .pca import pca
 from .permutation_test import permutation_test
-from .roc import roc_calculate, roc_plot
+from .roc import roc_calculate, roc_calculate_many, roc_plot
 from .scatter import scatter
 from .scatterCI import scatterCI
 
-__all__ = ["boxplot", "distribution", "pca", "permutation_test", "roc_calculate", "roc_plot", "scatter", "scatterCI"]
+__all__ = ["boxplot", "distribution", "pca", "permutation_test", "roc_calculate", "roc_calculate_many", "roc_plot", "scatter", "scatterCI"]
@@ -7,7 +7,7 @@ from bokeh.plotting import ColumnDataSource, figure
 from scipy.stats import ttest_1samp
 from sklearn.model_selection import StratifiedKFold
 from tqdm import tqdm
-from ..utils import binary_metrics
+from ..utils import binary_metrics, Dataset
 
 
 def permutation_test(model, X, Y, nperm=100, folds=8):
@@ -19,14 +19,23 @@ def permutation_test(model, X, Y, nperm=100, folds=8):
     model : object
         This object is assumed to store bootlist attributes in .model (e.g. modelPLS.model.x_scores_).
 
-    X : array-like, shape = [n_samples, n_features]
-        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors.
+    X : array-like or Dataset, shape = [n_samples, n_features]
+        Predictor variables, where n_samples is the number of samples and n_features is the number of predictors. If X is a Dataset, Y is taken from it and the model is trained on Dataset subsets (skipping the per-call checks).
 
     Y : array-like, shape = [n_samples, 1]
-        Response variables, where n_samples is the number of samples.
+        Response variables, where n_samples is the number of samples (ignored if X is a Dataset).
     """
     
-    model = deepcopy(model)
+    # The fitted model is only used for stats_full, and an untrained copy (hyper-parameters only) is refitted
+    fitted_model = model
+    model = model.clone() if hasattr(model, "clone") else deepcopy(model)
+
+    # A Dataset is validated once (the permuted Y and folds are passed to train as Datasets)
+    dataset = None
+    if isinstance(X, Dataset):
+        dataset = X
+        X = dataset.X
+        Y = dataset.Y
 
     # Get train and test idx using Stratified KFold
     skf = StratifiedKFold(n_splits=folds)
@@ -37,34 +46,43 @@ def permutation_test(model, X, Y, nperm=100, folds=8):
         testidx.append(test)
 
     # Calculate binary_metrics for stats_full
-    y_pred_full = model.test(X)
+    y_pred_full = fitted_model.test(X)
     stats_full = binary_metrics(Y, y_pred_full)
 
     # Calculate binary_metrics for stats_cv
-    y_pred_cv = [None] * len(Y)
-    for j in range(len(trainidx)):
-        X_train = X[trainidx[j], :]
-        Y_train = Y[trainidx[j]]
-        X_test = X[testidx[j], :]
-        model.train(X_train, Y_train)
-        y_pred = model.test(X_test)
-        for (idx, val) in zip(testidx[j], y_pred):
-            y_pred_cv[idx] = val.tolist()
+    y_pred_cv = calc_cv_ypred(model, X, Y, trainidx, testidx, dataset=dataset)
     stats_cv = binary_metrics(Y, y_pred_cv)
 
     # Extract R2, Q2
     stats = []
     stats.append([stats_full["R²"], stats_cv["R²"], 1])
 
-    # For each permutation, shuffle Y and calculate R2, Q2 and append to stats
-    for i in tqdm(range(nperm), desc="Permutation Resample"):
-        # Shuffle
+    # Shuffle Y for each permutation
+    Y_shuff_list = []
+    for i in range(nperm):
         Y_shuff = Y.copy()
         np.random.shuffle(Y_shuff)
+        Y_shuff_list.append(Y_shuff)
+
+    # If the model supports it, fit the full model for every permutation in one batched call
+    y_pred_full_perm = None
+    if hasattr(model, "train_many") and nperm > 0:
+        beta_perm = model.train_many(X, np.array(Y_shuff_list).T)[0]
+        y_pred_full_perm = X @ beta_perm[1:] + beta_perm[0]
+
+    # For each permutation, calculate R2, Q2 and append to stats
+    for i in tqdm(range(nperm), desc="Permutation Resample"):
+        Y_shuff = Y_shuff_list[i]
 
         # Model and calculate full binary_metrics
-        model.train(X, Y_shuff)
-        y_pred_full = model.test(X)
+        if y_pred_full_perm is not None:
+            y_pred_full = y_pred_full_perm[:, i]
+        else:
+            if dataset is not None:
+                model.train(dataset.with_Y(Y_shuff))
+            else:
+                model.train(X, Y_shuff)
+            y_pred_full = model.test(X)
         stats_full = binary_metrics(Y_shuff, y_pred_full)
 
         # Get train and test idx using Stratified KFold for Y_shuff
@@ -76,15 +94,7 @@ def permutation_test(model, X, Y, nperm=100, folds=8):
             testidx_nperm.append(test)
 
         # Model and calculate cv binary_metrics
-        y_pred_cv = [None] * len(Y_shuff)
-        for j in range(len(trainidx_nperm)):
-            X_train = X[trainidx_nperm[j], :]
-            Y_train = Y_shuff[trainidx_nperm[j]]
-            X_test = X[testidx_nperm[j], :]
-            model.train(X_train, Y_train)
-            y_pred = model.test(X_test)
-            for (idx, val) in zip(testidx_nperm[j], y_pred):
-                y_pred_cv[idx] = val.tolist()
+        y_pred_cv = calc_cv_ypred(model, X, Y_shuff, trainidx_nperm, testidx_nperm, dataset=None if dataset is None else dataset.with_Y(Y_shuff))
         stats_cv = binary_metrics(Y_shuff, y_pred_cv)
 
         # Calculate correlation using Pearson product-moment correlation coefficients and append permuted R2, Q2 and correlation coefficient
@@ -214,3 +224,27 @@ def permutation_test(model, X, Y, nperm=100, folds=8):
 
     fig = gridplot([[fig1, fig2]])
     return fig
+
+
+def calc_cv_ypred(model, X, Y, trainidx, testidx, dataset=None):
+    """Calculates ypred cv (using the fold-aware fit if the model supports it). If dataset is given, the model is trained on its subsets."""
+    y_pred_cv = [None] * len(Y)
+    if hasattr(model, "fit_folds"):
+        beta_folds = model.fit_folds(X, Y, testidx)[:, :, -1]
+        for j in range(len(testidx)):
+            y_pred = X[testidx[j], :] @ beta_folds[j][1:] + beta_folds[j][0]
+            for (idx, val) in zip(testidx[j], y_pred):
+                y_pred_cv[idx] = val.tolist()
+        return y_pred_cv
+    for j in range(len(trainidx)):
+        X_test = X[testidx[j], :]
+        if dataset is not None:
+            model.train(dataset.take(trainidx[j]))
+        else:
+            X_train = X[trainidx[j], :]
+            Y_train = Y[trainidx[j]]
+            model.train(X_train, Y_train)
+        y_pred = model.test(X_test)
+        for (idx, val) in zip(testidx[j], y_pred):
+            y_pred_cv[idx] = val.tolist()
+    return y_pred_cv
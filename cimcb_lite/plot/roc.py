@@ -111,13 +111,8 @@ def roc_calculate(Ytrue, Yscore, bootnum=1000, metric=None, val=None):
         True positive rates 95% confidence intervals [lowci, uppci].
     """
 
-    # Get fpr, tpr
-    fpr, tpr, threshold = metrics.roc_curve(Ytrue, Yscore, pos_label=1, drop_intermediate=False)
-
-    # fpr, tpr with drop_intermediates for fpr = 0 (useful for plot... since we plot specificity on x-axis, we don't need intermediates when fpr=0)
-    tpr0 = tpr[fpr == 0][-1]
-    tpr = np.concatenate([[tpr0], tpr[fpr > 0]])
-    fpr = np.concatenate([[0], fpr[fpr > 0]])
+    # Get fpr, tpr with drop_intermediates for fpr = 0 (useful for plot... since we plot specificity on x-axis, we don't need intermediates when fpr=0)
+    fpr, tpr = roc_curve_fpr0(Ytrue, Yscore)
 
     # if metric is provided, calculate stats
     if metric is not None:
@@ -133,15 +128,10 @@ def roc_calculate(Ytrue, Yscore, bootnum=1000, metric=None, val=None):
     for i in range(bootnum):
         # Resample and get tpr, fpr
         Ytrue_res, Yscore_res = resample(Ytrue, Yscore)
-        fpr_res, tpr_res, threshold_res = metrics.roc_curve(Ytrue_res, Yscore_res, pos_label=1, drop_intermediate=False)
-
-        # Drop intermediates when fpr=0
-        tpr0_res = tpr_res[fpr_res == 0][-1]
-        tpr_res = np.concatenate([[tpr0_res], tpr_res[fpr_res > 0]])
-        fpr_res = np.concatenate([[0], fpr_res[fpr_res > 0]])
+        fpr_res, tpr_res = roc_curve_fpr0(Ytrue_res, Yscore_res)
 
         # Vertical averaging... use closest fpr_res to fpr, and append the corresponding tpr
-        idx = [np.abs(i - fpr_res).argmin() for i in fpr]
+        idx = nearest_idx(fpr_res, fpr)
         tpr_list = tpr_res[idx]
         tpr_boot.append(tpr_list)
 
@@ -184,6 +174,118 @@ def roc_calculate(Ytrue, Yscore, bootnum=1000, metric=None, val=None):
         return fpr, tpr, tpr_ci, stats, bootci_stats
 
 
+def roc_calculate_many(Ytrue, Yscores, bootnum=1000):
+    """Calculates fpr, tpr and tpr_ci (as in roc_calculate) for each column of Yscores in one batched bootstrap. Each resample is drawn once, and the tpr of every column is calculated at once (see roc_tpr_many).
+
+    Parameters
+    ----------
+    Ytrue : array-like, shape = [n_samples]
+        Binary label for samples (0s and 1s)
+
+    Yscores : array-like, shape = [n_samples, n_scores]
+        Predicted y scores for samples (one column for each score).
+
+    Returns
+    ----------------------------------
+    rocs : list of tuples (fpr, tpr, tpr_ci)
+        fpr, tpr and tpr_ci for each column of Yscores (see roc_calculate).
+    """
+
+    Ytrue = np.asarray(Ytrue).ravel()
+    Yscores = np.asarray(Yscores)
+    if Yscores.ndim == 1:
+        Yscores = Yscores[:, np.newaxis]
+    n, num_scores = Yscores.shape
+
+    # Get fpr, tpr (with drop_intermediates for fpr = 0) for each score
+    fpr_list = []
+    tpr_list = []
+    for j in range(num_scores):
+        fpr, tpr = roc_curve_fpr0(Ytrue, Yscores[:, j])
+        fpr_list.append(fpr)
+        tpr_list.append(tpr)
+
+    # bootstrap using vertical averaging (the same resample for every score)
+    tpr_boot = [np.empty((bootnum, len(fpr))) for fpr in fpr_list]
+    for i in range(bootnum):
+        bootidx = np.random.randint(n, size=n)
+        Ytrue_res = Ytrue[bootidx]
+        tpr_res = roc_tpr_many(Ytrue_res, Yscores[bootidx], fpr_list)
+        for j in range(num_scores):
+            tpr_boot[j][i] = tpr_res[j]
+
+    # Get CI for tpr, and add the starting 0
+    rocs = []
+    for j in range(num_scores):
+        tpr_lowci = np.insert(np.percentile(tpr_boot[j], 2.5, axis=0), 0, 0)
+        tpr_uppci = np.insert(np.percentile(tpr_boot[j], 97.5, axis=0), 0, 0)
+        tpr = np.insert(tpr_list[j], 0, 0)
+        fpr = np.insert(fpr_list[j], 0, 0)
+        rocs.append((fpr, tpr, np.array([tpr_lowci, tpr_uppci])))
+    return rocs
+
+
+def roc_curve_fpr0(Ytrue, Yscore):
+    """Get fpr, tpr with drop_intermediates for fpr = 0."""
+    fpr, tpr, threshold = metrics.roc_curve(Ytrue, Yscore, pos_label=1, drop_intermediate=False)
+    tpr0 = tpr[fpr == 0][-1]
+    tpr = np.concatenate([[tpr0], tpr[fpr > 0]])
+    fpr = np.concatenate([[0], fpr[fpr > 0]])
+    return fpr, tpr
+
+
+def roc_tpr_many(Ytrue, Yscores, fpr_list):
+    """For each column j of Yscores, the tpr of its roc_curve_fpr0 curve at the closest fpr (see nearest_idx) to each value in fpr_list[j]. Every column is sorted in one argsort and the true/false positives are one cumsum, so the ROC curves are not calculated one at a time.
+
+    The fpr of the curves are k / n_negatives, so the curve of column j is stored on this grid: the tpr at the first threshold with k false positives (the largest tpr for k = 0), or missing if the false positives skip k (tied scores).
+    """
+    n, num_scores = Yscores.shape
+    Ytrue = np.asarray(Ytrue, dtype=int)
+    npos = np.sum(Ytrue)
+    nneg = n - npos
+
+    # True and false positives for each threshold (in decreasing order of score), where the thresholds are the last row of each run of tied scores
+    order = np.argsort(-Yscores, axis=0, kind="stable")
+    column = np.broadcast_to(np.arange(num_scores), (n, num_scores))
+    Yscores_sorted = Yscores[order, column]
+    tps = np.cumsum(Ytrue[order], axis=0)
+    fps = np.arange(1, n + 1)[:, np.newaxis] - tps
+    threshold = np.ones((n, num_scores), dtype=bool)
+    threshold[:-1] = Yscores_sorted[:-1] != Yscores_sorted[1:]
+
+    # tps on the grid of false positives (n + 1 if missing)
+    tps_grid = np.full((nneg + 1, num_scores), n + 1)
+    np.minimum.at(tps_grid, (fps[threshold], column[threshold]), tps[threshold])
+    tps_grid[0] = np.max(np.where(threshold & (fps == 0), tps, 0), axis=0)
+    exists = tps_grid <= n
+
+    # The closest existing grid point below and above each k (k = 0 and k = nneg always exist)
+    k = np.broadcast_to(np.arange(nneg + 1)[:, np.newaxis], exists.shape)
+    below = np.maximum.accumulate(np.where(exists, k, 0), axis=0)
+    above = np.minimum.accumulate(np.where(exists, k, nneg)[::-1], axis=0)[::-1]
+
+    # Closest fpr (ties go to the lower fpr, as in nearest_idx)
+    grid = np.arange(nneg + 1) / nneg
+    tpr_list = []
+    for j, fpr in enumerate(fpr_list):
+        right = np.searchsorted(grid, fpr, side="left")
+        upper = above[right, j]
+        lower = below[np.clip(right - 1, 0, None), j]
+        use_lower = (right > 0) & (np.abs(fpr - grid[lower]) <= np.abs(grid[upper] - fpr))
+        tpr_list.append(tps_grid[np.where(use_lower, lower, upper), j] / npos)
+    return tpr_list
+
+
+def nearest_idx(fpr_res, fpr):
+    """Index of the closest value in fpr_res (sorted) for each value in fpr, using a binary search. Ties go to the first index, as with np.abs(i - fpr_res).argmin()."""
+    right = np.clip(np.searchsorted(fpr_res, fpr, side="left"), 0, len(fpr_res) - 1)
+    left = np.clip(right - 1, 0, None)
+    use_left = np.abs(fpr - fpr_res[left]) <= np.abs(fpr_res[right] - fpr)
+    idx = np.where(use_left, left, right)
+    # First index of the chosen value (fpr_res can repeat a value)
+    return np.searchsorted(fpr_res, fpr_res[idx], side="left")
+
+
 def get_sens_spec(Ytrue, Yscore, cuttoff_val):
     """Get sensitivity and specificity from cutoff value."""
     Yscore_round = np.where(np.array(Yscore) > cuttoff_val, 1, 0)
@@ -0,0 +1,148 @@
+import threading
+import time
+import numpy as np
+from collections import deque
+
+
+class MicroBatcher(object):
+    """ Coalesces concurrent scoring requests for one model into micro-batches. Request threads add their rows to a queue and wait; a worker thread takes up to max_batch rows (waiting at most max_wait seconds for more after the first request), scores them with one call to model.test and returns each request its rows.
+
+    Parameters
+    ----------
+    model : PLS_SIMPLS (or any model with test)
+        Fitted model.
+
+    max_batch : int, (default 256)
+        Maximum number of rows scored in one call to test.
+
+    max_wait : float, (default 0.002)
+        Maximum time (in seconds) to wait for more requests after the first request of a batch.
+
+    window : int, (default 10000)
+        Number of recent requests used for the latency percentiles.
+
+    Methods
+    -------
+    submit : Score X (blocks until the batch containing X is scored).
+
+    stats : Return latency (p50/p99) and throughput stats.
+
+    close : Stop the worker thread.
+    """
+
+    def __init__(self, model, max_batch=256, max_wait=0.002, window=10000):
+        if max_batch < 1:
+            raise ValueError("max_batch needs to be at least 1.")
+        self.model = model
+        self.n_features = len(np.ravel(model.model.coef_))
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Stats (latency in seconds of the most recent requests)
+        self._latency = deque(maxlen=window)
+        self._start = time.perf_counter()
+        self._n_requests = 0
+        self._n_samples = 0
+        self._n_batches = 0
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, X):
+        """Score X (array-like, shape = [n_samples, n_features] or [n_features] for a single sample) and return the Y predicted values, shape = [n_samples]."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+
+        # Error checks (before queueing, so one bad request can't fail the whole batch)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError("X needs to have {} features.".format(self.n_features))
+        if np.isnan(X).any():
+            raise ValueError("NaNs found in X.")
+
+        request = {"X": X, "done": threading.Event(), "y_pred": None, "error": None, "start": time.perf_counter()}
+        with self._cond:
+            if self._closed is True:
+                raise ValueError("MicroBatcher is closed.")
+            self._queue.append(request)
+            self._cond.notify()
+        request["done"].wait()
+        if request["error"] is not None:
+            raise request["error"]
+        return request["y_pred"]
+
+    def _run(self):
+        """Worker loop: collect a micro-batch, score it with one call to test and return each request its rows."""
+        while True:
+            with self._cond:
+                while len(self._queue) == 0 and self._closed is False:
+                    self._cond.wait()
+                if len(self._queue) == 0:
+                    return
+
+                # Take the first request, then wait up to max_wait for the batch to fill up
+                batch = [self._queue.popleft()]
+                nrows = len(batch[0]["X"])
+                deadline = time.perf_counter() + self.max_wait
+                while nrows < self.max_batch:
+                    if len(self._queue) == 0:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0 or self._closed is True:
+                            break
+                        self._cond.wait(remaining)
+                        continue
+                    if nrows + len(self._queue[0]["X"]) > self.max_batch:
+                        break
+                    request = self._queue.popleft()
+                    batch.append(request)
+                    nrows += len(request["X"])
+
+            # Score the batch (outside the lock, so requests can keep queueing)
+            try:
+                X = batch[0]["X"] if len(batch) == 1 else np.vstack([i["X"] for i in batch])
+                y_pred = np.ravel(self.model.test(X))
+                offsets = np.cumsum([0] + [len(i["X"]) for i in batch])
+                for i, request in enumerate(batch):
+                    request["y_pred"] = y_pred[offsets[i] : offsets[i + 1]]
+            except Exception as e:
+                for request in batch:
+                    request["error"] = e
+
+            end = time.perf_counter()
+            with self._cond:
+                self._n_batches += 1
+                for request in batch:
+                    self._latency.append(end - request["start"])
+                    self._n_requests += 1
+                    self._n_samples += len(request["X"])
+            for request in batch:
+                request["done"].set()
+
+    def stats(self):
+        """Return a dict with the p50 and p99 latency (ms) of the recent requests, and the number of requests, samples and batches, mean batch size and throughput (per second) since the start."""
+        with self._cond:
+            latency = np.array(self._latency)
+            n_requests = self._n_requests
+            n_samples = self._n_samples
+            n_batches = self._n_batches
+        elapsed = time.perf_counter() - self._start
+        stats = {}
+        stats["n_requests"] = n_requests
+        stats["n_samples"] = n_samples
+        stats["n_batches"] = n_batches
+        stats["mean_batch_size"] = n_samples / n_batches if n_batches > 0 else 0.0
+        stats["p50_ms"] = float(np.percentile(latency, 50) * 1000) if len(latency) > 0 else None
+        stats["p99_ms"] = float(np.percentile(latency, 99) * 1000) if len(latency) > 0 else None
+        stats["requests_per_s"] = n_requests / elapsed
+        stats["samples_per_s"] = n_samples / elapsed
+        return stats
+
+    def close(self):
+        """Stop the worker thread (queued requests are scored first)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
@@ -0,0 +1,161 @@
+import json
+import os
+import socketserver
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from ..model import PLS_SIMPLS
+from .MicroBatcher import MicroBatcher
+
+
+class ScoringServer(object):
+    """ Long-lived scoring service for saved PLS_SIMPLS models. The models are loaded once (memory-mapped) and concurrent requests for each model are coalesced into micro-batches (see MicroBatcher). Requests are served over localhost HTTP or a Unix socket.
+
+    Parameters
+    ----------
+    models : dict
+        Model name -> directory the model was saved in with PLS_SIMPLS.save (or a fitted PLS_SIMPLS).
+
+    max_batch : int, (default 256)
+        Maximum number of rows scored in one call to test.
+
+    max_wait : float, (default 0.002)
+        Maximum time (in seconds) to wait for more requests after the first request of a batch.
+
+    Methods
+    -------
+    predict : Score X with a model (used by the HTTP and Unix socket handlers).
+
+    stats : Return the latency (p50/p99) and throughput stats for each model.
+
+    serve_http : Serve over HTTP on host:port (localhost by default).
+
+    serve_unix : Serve newline-delimited JSON over a Unix socket.
+
+    close : Stop the server and the batching threads.
+
+    Protocol
+    --------
+    HTTP: POST /predict/<model> with {"X": [[...], ...]} returns {"y_pred": [...]}. GET /stats returns the stats.
+
+    Unix socket: each line {"model": <model>, "X": [[...], ...]} returns a line {"y_pred": [...]}, and {"stats": true} returns the stats. Errors are returned as {"error": <message>}.
+    """
+
+    def __init__(self, models, max_batch=256, max_wait=0.002):
+        if len(models) == 0:
+            raise ValueError("models needs to contain at least 1 model.")
+        self.batchers = {}
+        for name, model in models.items():
+            if isinstance(model, str):
+                model = PLS_SIMPLS.load(model)
+            self.batchers[name] = MicroBatcher(model, max_batch=max_batch, max_wait=max_wait)
+        self._server = None
+
+    def predict(self, name, X):
+        """Return the Y predicted values (as a list) of model name for X."""
+        if name not in self.batchers:
+            raise ValueError("Model '{}' does not exist.".format(name))
+        return self.batchers[name].submit(X).tolist()
+
+    def stats(self):
+        """Return a dict of model name -> latency and throughput stats."""
+        return {name: batcher.stats() for name, batcher in self.batchers.items()}
+
+    def handle(self, request):
+        """Return the response (a dict) for a decoded request dict (Unix socket protocol)."""
+        if not isinstance(request, dict):
+            return {"error": "Request needs to be a JSON object."}
+        try:
+            if request.get("stats", False) is True:
+                return self.stats()
+            return {"y_pred": self.predict(request["model"], request["X"])}
+        except (KeyError, ValueError, TypeError) as e:
+            return {"error": str(e)}
+
+    def serve_http(self, host="127.0.0.1", port=8000):
+        """Serve over HTTP (one thread per connection) until close is called."""
+        self._server = _ThreadingHTTPServer((host, port), _HTTPHandler)
+        self._server.scorer = self
+        self._server.serve_forever()
+
+    def serve_unix(self, path):
+        """Serve newline-delimited JSON over the Unix socket path (one thread per connection) until close is called."""
+        if os.path.exists(path):
+            os.remove(path)
+        self._server = _ThreadingUnixServer(path, _UnixHandler)
+        self._server.scorer = self
+        try:
+            self._server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        """Stop serving and stop the batching threads."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for batcher in self.batchers.values():
+            batcher.close()
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    """HTTP handler: POST /predict/<model> and GET /stats."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients don't reconnect for every request
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send(200, self.server.scorer.stats())
+        else:
+            self._send(404, {"error": "Not found."})
+
+    def do_POST(self):
+        if not self.path.startswith("/predict/"):
+            self._send(404, {"error": "Not found."})
+            return
+        name = self.path[len("/predict/") :].rstrip("/")
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            request = json.loads(body.decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("Request needs to be a JSON object.")
+            X = request["X"]
+            self._send(200, {"y_pred": self.server.scorer.predict(name, X)})
+        except (KeyError, ValueError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+
+    def _send(self, status, response):
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # No per-request logging (use stats instead)
+        pass
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+    """Unix socket handler: one JSON request per line, one JSON response per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            if len(line.strip()) == 0:
+                continue
+            # Any error is returned for this line (so one bad request can't close the connection)
+            try:
+                response = self.server.scorer.handle(json.loads(line.decode("utf-8")))
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
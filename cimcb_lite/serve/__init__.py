@@ -0,0 +1,4 @@
+from .MicroBatcher import MicroBatcher
+from .ScoringServer import ScoringServer
+
+__all__ = ["MicroBatcher", "ScoringServer"]
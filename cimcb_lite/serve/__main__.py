@@ -0,0 +1,42 @@
+"""Scoring service entry point, e.g.
+
+    python -m cimcb_lite.serve --model plasma=models/plasma --http 127.0.0.1:8000
+    python -m cimcb_lite.serve --model plasma=models/plasma --socket /tmp/cimcb.sock
+"""
+import argparse
+from .ScoringServer import ScoringServer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m cimcb_lite.serve", description="Serve saved PLS_SIMPLS models over localhost HTTP or a Unix socket.")
+    parser.add_argument("--model", action="append", required=True, metavar="NAME=PATH", help="model name and the directory it was saved in (can be repeated)")
+    parser.add_argument("--http", metavar="HOST:PORT", help="serve over HTTP (e.g. 127.0.0.1:8000)")
+    parser.add_argument("--socket", metavar="PATH", help="serve over a Unix socket")
+    parser.add_argument("--max-batch", type=int, default=256, help="maximum number of rows scored in one batch (default 256)")
+    parser.add_argument("--max-wait", type=float, default=0.002, help="maximum time in seconds to wait for a batch to fill up (default 0.002)")
+    args = parser.parse_args(argv)
+
+    if (args.http is None) == (args.socket is None):
+        parser.error("use either --http or --socket")
+    models = {}
+    for i in args.model:
+        if "=" not in i:
+            parser.error("--model needs to be NAME=PATH")
+        name, path = i.split("=", 1)
+        models[name] = path
+
+    server = ScoringServer(models, max_batch=args.max_batch, max_wait=args.max_wait)
+    try:
+        if args.http is not None:
+            host, port = args.http.rsplit(":", 1)
+            server.serve_http(host, int(port))
+        else:
+            server.serve_unix(args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
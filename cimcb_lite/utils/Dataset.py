@@ -0,0 +1,134 @@
+import numpy as np
+from copy import copy
+from .table_check import table_check
+
+
+class Dataset(object):
+    """ Validated numeric data for modelling, built once from DataTable and PeakTable. The tables are checked with table_check and the peaks are copied into one contiguous matrix, so train, the bootstrap classes, kfold and permutation_test can skip their per-call checks and DataFrame conversions.
+
+    Parameters
+    ----------
+    DataTable: DataFrame
+        Data sheet with the required columns.
+
+    PeakTable: DataFrame
+        Peak sheet with the required columns.
+
+    group: string, (default 'Class')
+        Name of the column in the DataTable that contains the Class data.
+
+    posclass: number, string or None, (default None)
+        Name of the positive class in the group column. If given, Y is 1 for posclass and 0 for the other class (the group column should then have exactly 2 groups).
+
+    peaklist: list or None, (default None)
+        Names of the peaks to use (in order). If None, PeakTable['Name'] is used.
+
+    dtype : numpy dtype or None, (default None)
+        Floating point type of X. If None, float64 is used.
+
+    Attributes
+    ----------
+    X : array-like, shape = [n_samples, n_features]
+        Peaks as a C-contiguous array.
+
+    Y : array-like, shape = [n_samples] or None
+        Response (0s and 1s) if posclass is given.
+
+    classes : array-like
+        Unique values of the group column.
+
+    masks : dict of arrays
+        Boolean mask of the samples in each class.
+
+    peak_index : dict
+        Peak name -> column index of X.
+
+    has_nan : boolean
+        True if X contains NaNs.
+
+    Methods
+    -------
+    take : Return the Dataset for a subset (or resample) of the samples without repeating the checks.
+
+    with_Y : Return the Dataset with a new Y (e.g. a permuted Y), sharing X.
+
+    peaks : Return the columns of X for a list of peak names.
+
+    check_binary : Error checks for a binary model (repeats only the cheap checks).
+    """
+
+    def __init__(self, DataTable, PeakTable, group="Class", posclass=None, peaklist=None, dtype=None):
+
+        # Error checks
+        table_check(DataTable, PeakTable, print_statement=False)
+        if group not in DataTable:
+            raise ValueError("Column '{}' does not exist in DataTable".format(group))
+        if peaklist is None:
+            peaklist = PeakTable["Name"]
+        peaklist = list(peaklist)
+        missing = [i for i in peaklist if i not in DataTable]
+        if len(missing) > 0:
+            raise ValueError("DataTable does not contain {} of the peaks in peaklist e.g. {}".format(len(missing), missing[:5]))
+
+        # Peaks as one contiguous matrix, and the peak name -> column index map
+        self.peaklist = peaklist
+        self.peak_index = {name: i for i, name in enumerate(peaklist)}
+        self.X = np.ascontiguousarray(DataTable[peaklist].values, dtype=np.float64 if dtype is None else dtype)
+        self.has_nan = bool(np.isnan(self.X).any())
+
+        # Class masks, and Y if posclass is given
+        labels = DataTable[group].values
+        self.group = group
+        self.classes = np.unique(labels)
+        self.masks = {i: labels == i for i in self.classes}
+        self.Y = None
+        if posclass is not None:
+            if posclass not in self.masks:
+                raise ValueError("Positive class was not found in '{}' column.".format(group))
+            if len(self.classes) != 2:
+                raise ValueError("Column '{}' should have exactly 2 groups".format(group))
+            self.Y = self.masks[posclass].astype(int)
+        self.posclass = posclass
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    @property
+    def shape(self):
+        return self.X.shape
+
+    def take(self, idx):
+        """Return the Dataset for the samples in idx (indices or a boolean mask, e.g. a bootstrap resample or a cross-validation fold). The tables are not checked again."""
+        subset = copy(self)
+        subset.X = self.X[idx]
+        if self.Y is not None:
+            subset.Y = self.Y[idx]
+        subset.masks = {i: mask[idx] for i, mask in self.masks.items()}
+        if self.has_nan is True:
+            subset.has_nan = bool(np.isnan(subset.X).any())
+        return subset
+
+    def with_Y(self, Y):
+        """Return the Dataset with Y replaced (e.g. a permuted Y). X is shared, not copied."""
+        Y = np.asarray(Y)
+        if len(Y) != len(self):
+            raise ValueError("length of Y does not match length of X.")
+        if not np.isin(Y, [0, 1]).all():
+            raise ValueError("Y should only contain 0s and 1s.")
+        new = copy(self)
+        new.Y = Y
+        return new
+
+    def peaks(self, peaklist):
+        """Return the columns of X for the peak names in peaklist."""
+        idx = [self.peak_index[i] for i in peaklist]
+        return self.X[:, idx]
+
+    def check_binary(self):
+        """Error checks for a binary model (Y has 0s and 1s for both groups, and X has no NaNs). Only the cheap checks are repeated for subsets."""
+        if self.Y is None:
+            raise ValueError("Dataset has no Y. Set posclass to use it for a binary model.")
+        if self.has_nan is True:
+            raise ValueError("NaNs found in X.")
+        if len(self.Y) == 0 or self.Y.min() == self.Y.max():
+            raise ValueError("Y needs to have 2 groups. There is 1")
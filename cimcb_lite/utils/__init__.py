@@ -1,5 +1,6 @@
 from .binary_metrics import binary_metrics
 from .ci95_ellipse import ci95_ellipse
+from .Dataset import Dataset
 from .knnimpute import knnimpute
 from .load_dataXL import load_dataXL
 from .scale import scale
@@ -8,4 +9,4 @@ from .table_check import table_check
 from .univariate_2class import univariate_2class
 from .wmean import wmean
 
-__all__ = ["binary_metrics", "ci95_ellipse", "knnimpute", "load_dataXL", "scale", "nested_getattr", "table_check", "univariate_2class", "wmean"]
+__all__ = ["binary_metrics", "ci95_ellipse", "Dataset", "knnimpute", "load_dataXL", "scale", "nested_getattr", "table_check", "univariate_2class", "wmean"]
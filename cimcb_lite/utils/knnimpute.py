@@ -4,7 +4,7 @@ from scipy.spatial.distance import pdist, squareform
 from .wmean import wmean
 
 
-def knnimpute(x, k=3):
+def knnimpute(x, k=3, dtype=None):
     """kNN missing value imputation using Euclidean distance.
 
     Parameters
@@ -15,12 +15,19 @@ def knnimpute(x, k=3):
     k: positive integer excluding 0, (default 3)
         The number of nearest neighbours to use.
 
+    dtype: numpy dtype or None, (default None)
+        If dtype is provided, x is converted to dtype and z is returned as dtype e.g. np.float32 keeps float32 data as float32.
+
     Returns
     -------
     z: array-like
         An array-like object corresponding to x with NaNs imputed.
     """
     
+    # Convert x to dtype (if provided)
+    if dtype is not None:
+        x = np.asarray(x, dtype=dtype)
+
     # Tranpose x so we treat columns as features, and rows as samples
     x = x.T
     
@@ -1,7 +1,7 @@
 import numpy as np
 
 
-def scale(x, axis=0, ddof=1, method="auto", mu="default", sigma="default", return_mu_sigma=False):
+def scale(x, axis=0, ddof=1, method="auto", mu="default", sigma="default", return_mu_sigma=False, dtype=None):
     """Scales x (which can include nans) with method: 'auto', 'pareto', 'vast', or 'level'.
 
     Parameters
@@ -27,6 +27,9 @@ def scale(x, axis=0, ddof=1, method="auto", mu="default", sigma="default", retur
     return_mu_sigma: boolean, (default False)
         If return_mu_sigma is True, mu and sigma are returned instead of z. Note, this is useful if mu and sigma want to be stored for future use.
 
+    dtype: numpy dtype or None, (default None)
+        If dtype is provided, x is converted to dtype and z (or mu and sigma) is returned as dtype e.g. np.float32 keeps float32 data as float32.
+
     Returns if return_mu_sigma = False
     ----------------------------------
     z: array-like
@@ -41,7 +44,7 @@ def scale(x, axis=0, ddof=1, method="auto", mu="default", sigma="default", retur
         Calculated sigma for x given axis and ddof.
     """
 
-    x = np.array(x)
+    x = np.array(x, dtype=dtype)
 
     # Simplier if we tranpose X if axis=1 (return x.T after the calculations)
     if axis == 1:
@@ -80,6 +83,12 @@ def scale(x, axis=0, ddof=1, method="auto", mu="default", sigma="default", retur
     if axis == 1:
         z = z.T
 
+    # Keep the selected dtype (mu and sigma may have been provided as float64)
+    if dtype is not None:
+        z = z.astype(dtype, copy=False)
+        mu = np.asarray(mu, dtype=dtype)
+        sigma = np.asarray(sigma, dtype=dtype)
+
     if return_mu_sigma is True:
         return mu, sigma
     else:
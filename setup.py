@@ -16,6 +16,7 @@ setup(
         "cimcb_lite.cross_val",
         "cimcb_lite.model",
         "cimcb_lite.plot",
+        "cimcb_lite.serve",
         "cimcb_lite.utils"],
     python_requires='>=3.5',
     install_requires=[
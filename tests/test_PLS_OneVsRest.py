@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from cimcb_lite.model import PLS_OneVsRest
+
+
+def three_class_data(n_small=3):
+    rng = np.random.RandomState(0)
+    Y = np.array(["A"] * 21 + ["B"] * 21 + ["C"] * n_small)
+    X = rng.normal(size=(len(Y), 30))
+    X[Y == "B", :5] += 2
+    X[Y == "C", 5:10] += 2
+    return X, Y
+
+
+def test_bootci_fixed_classes():
+    """Bootstrap resamples are fitted for the classes of the trained model, so every resample has the same columns."""
+    X, Y = three_class_data(n_small=15)
+    model = PLS_OneVsRest(n_components=2)
+    model.train(X, Y)
+    assert model.get_params()["classes"].tolist() == ["A", "B", "C"]
+    model.calc_bootci(bootnum=20, type="perc")
+    assert model.bootci["model.coef_"].shape == (3, 30, 2)
+    assert model.bootci["model.vip_"].shape == (3, 30, 2)
+
+
+def test_bootci_small_class():
+    """A resample that leaves out a small class is rejected with a clear error (rather than changing the number of classes)."""
+    X, Y = three_class_data(n_small=3)
+    model = PLS_OneVsRest(n_components=2)
+    model.train(X, Y)
+    with pytest.raises(ValueError, match="no samples of class"):
+        model.clone().train(X[Y != "C"], Y[Y != "C"])
+    with pytest.raises(ValueError, match="no samples of class"):
+        model.calc_bootci(bootnum=100, type="perc")
+
+
+def test_unknown_class():
+    X, Y = three_class_data()
+    model = PLS_OneVsRest(n_components=2, classes=["A", "B"])
+    with pytest.raises(ValueError, match="not in classes"):
+        model.train(X, Y)
+
+
+@pytest.mark.parametrize("method", ["evaluate", "permutation_test", "plot_featureimportance"])
+def test_binary_only_methods(method):
+    X, Y = three_class_data()
+    model = PLS_OneVsRest(n_components=2)
+    model.train(X, Y)
+    with pytest.raises(NotImplementedError, match="binary"):
+        getattr(model, method)()
+    with pytest.raises(ValueError, match="binary"):
+        model.calc_bootci(bootnum=5, oob=True)
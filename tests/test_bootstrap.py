@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import scipy.sparse
+from cimcb_lite.bootstrap import BC, BCA
+from cimcb_lite.model import PLS_SIMPLS
+
+
+def test_sparse_n_jobs():
+    """scipy.sparse X can't be shared with worker processes, so n_jobs > 1 raises a ValueError (and n_jobs=None works)."""
+    rng = np.random.RandomState(0)
+    X = scipy.sparse.random(40, 30, density=0.3, format="csr", random_state=0)
+    Y = rng.randint(0, 2, 40)
+    model = PLS_SIMPLS(n_components=2)
+    model.train(X, Y)
+    with pytest.raises(ValueError, match="scipy.sparse"):
+        model.calc_bootci(bootnum=4, type="perc", n_jobs=2)
+    model.calc_bootci(bootnum=4, type="perc")
+    assert model.bootci["model.coef_"].shape == (30, 2)
+
+
+def test_bca_falls_back_to_bc_from_first_failure():
+    """Once BCA is not possible for a feature, BC is used for that feature and every feature after it (for each component)."""
+    rng = np.random.RandomState(1)
+    bootstat = [rng.normal(size=(20, 2)) for i in range(200)]
+    stat = rng.normal(size=(20, 2)) * 0.1
+    jackstat = [rng.normal(size=(20, 2)) for i in range(40)]
+    jackstat_fail = [j.copy() for j in jackstat]
+    for j in jackstat_fail:
+        j[8, 0] = 1.0  # ahat is NaN for feature 8 of component 0
+
+    bca = BCA.bootci_method(bootstat, stat, jackstat_fail)
+    bc = BC.bootci_method(bootstat, stat)
+    nofail = BCA.bootci_method(bootstat, stat, jackstat)
+    assert np.array_equal(bca[0, 8:], bc[0, 8:])
+    assert np.array_equal(bca[0, :8], nofail[0, :8])
+    assert not np.array_equal(bca[0, 9:], nofail[0, 9:])
+    assert np.array_equal(bca[1], nofail[1])
@@ -0,0 +1,33 @@
+import inspect
+import numpy as np
+import pytest
+from cimcb_lite.model import PLS_OneVsRest, PLS_SIMPLS
+
+
+@pytest.mark.parametrize("model", [PLS_SIMPLS(n_components=3, solver="kernel", dtype=np.float32, block_size=50, retain_training_data=False), PLS_SIMPLS(), PLS_OneVsRest(n_components=3, dtype=np.float32, retain_training_data=False, classes=["A", "B", "C"]), PLS_OneVsRest()])
+def test_get_params_round_trip(model):
+    """get_params returns every argument of __init__, and a model built from it has the same parameters."""
+    params = model.get_params()
+    assert set(params) == set(inspect.signature(type(model).__init__).parameters) - {"self"}
+    params_clone = type(model)(**params).get_params()
+    assert params_clone.keys() == params.keys()
+    for name in params:
+        assert np.array_equal(params_clone[name], params[name])
+
+
+def test_clone_is_untrained():
+    """clone keeps the hyper-parameters but not the training data or fitted arrays, and the clone trains to the same model."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(30, 20))
+    Y = np.repeat([0, 1], 15)
+    model = PLS_SIMPLS(n_components=3, solver="simpls", block_size=10)
+    model.train(X, Y)
+
+    clone = model.clone()
+    assert type(clone) is PLS_SIMPLS
+    assert clone.get_params() == model.get_params()
+    assert clone.model is not model.model
+    assert not hasattr(clone.model, "beta_")
+    assert getattr(clone, "X", None) is None
+    clone.train(X, Y)
+    assert np.allclose(clone.model.beta_, model.model.beta_)
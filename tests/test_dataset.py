@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cimcb_lite.bootstrap import Perc
+from cimcb_lite.cross_val import kfold
+from cimcb_lite.model import PLS_SIMPLS
+from cimcb_lite.utils import Dataset
+
+
+def tables(n=40, n_peaks=12):
+    rng = np.random.RandomState(0)
+    names = ["M{}".format(i + 1) for i in range(n_peaks)]
+    DataTable = pd.DataFrame(rng.normal(size=(n, n_peaks)), columns=names)
+    DataTable.insert(0, "Idx", np.arange(1, n + 1))
+    DataTable.insert(1, "SampleID", ["S{}".format(i) for i in range(n)])
+    DataTable.insert(2, "Class", np.repeat(["GC", "HE"], n // 2))
+    DataTable.loc[DataTable["Class"] == "GC", names[:3]] += 1
+    PeakTable = pd.DataFrame({"Idx": np.arange(1, n_peaks + 1), "Name": names, "Label": names})
+    return DataTable, PeakTable
+
+
+def test_dataset_train_matches_arrays():
+    """Training on a Dataset (which skips the per-call checks) gives the same model as training on X and Y, and keeps the peak names."""
+    DataTable, PeakTable = tables()
+    dataset = Dataset(DataTable, PeakTable, posclass="GC")
+    X = DataTable[PeakTable["Name"]].values
+    Y = (DataTable["Class"] == "GC").values.astype(int)
+    assert np.array_equal(dataset.X, X)
+    assert np.array_equal(dataset.Y, Y)
+    assert dataset.X.flags["C_CONTIGUOUS"]
+
+    model = PLS_SIMPLS(n_components=2)
+    y_pred = model.train(dataset)
+    model_ref = PLS_SIMPLS(n_components=2)
+    assert np.allclose(y_pred, model_ref.train(X, Y))
+    assert np.allclose(model.model.beta_, model_ref.model.beta_)
+    assert np.allclose(model.predict(DataTable[PeakTable["Name"][::-1]]), y_pred)
+
+    subset = dataset.take(np.arange(0, 40, 2))
+    assert np.allclose(PLS_SIMPLS(n_components=2).train(subset), model_ref.train(X[::2], Y[::2]))
+    assert np.array_equal(dataset.peaks(["M3", "M1"]), X[:, [2, 0]])
+
+
+def test_dataset_checks():
+    """The cheap checks are still made for a Dataset and its subsets."""
+    DataTable, PeakTable = tables()
+    with pytest.raises(ValueError, match="no Y"):
+        PLS_SIMPLS().train(Dataset(DataTable, PeakTable))
+    with pytest.raises(ValueError, match="Positive class"):
+        Dataset(DataTable, PeakTable, posclass="missing")
+
+    dataset = Dataset(DataTable, PeakTable, posclass="GC")
+    with pytest.raises(ValueError, match="2 groups"):
+        PLS_SIMPLS().train(dataset.take(np.arange(20)))
+    with pytest.raises(ValueError, match="0s and 1s"):
+        dataset.with_Y(dataset.Y + 1)
+
+    DataTable.loc[5, "M2"] = np.nan
+    dataset = Dataset(DataTable, PeakTable, posclass="GC")
+    assert dataset.has_nan is True
+    with pytest.raises(ValueError, match="NaNs"):
+        PLS_SIMPLS().train(dataset)
+    assert dataset.take(np.delete(np.arange(40), 5)).has_nan is False
+
+
+def test_dataset_bootstrap_kfold():
+    """The bootstrap and kfold results on a Dataset (resamples passed to train as Datasets) match those on X and Y."""
+    DataTable, PeakTable = tables()
+    dataset = Dataset(DataTable, PeakTable, posclass="GC")
+    model = PLS_SIMPLS(n_components=2)
+    model.train(dataset)
+
+    bootci = Perc(model, dataset, None, ["model.coef_"], bootnum=20, seed=3).run()
+    bootci_ref = Perc(model, dataset.X, dataset.Y, ["model.coef_"], bootnum=20, seed=3).run()
+    assert np.allclose(bootci["model.coef_"], bootci_ref["model.coef_"])
+
+    # solver makes kfold train a model for each setting (rather than the n_components path)
+    param_dict = {"n_components": [1, 2], "solver": ["simpls"]}
+    cv = kfold(PLS_SIMPLS, dataset, None, param_dict, folds=5, bootnum=1)
+    cv_ref = kfold(PLS_SIMPLS, dataset.X, dataset.Y, param_dict, folds=5, bootnum=1)
+    cv.calc_ypred()
+    cv_ref.calc_ypred()
+    assert np.allclose(cv.ypred_full, cv_ref.ypred_full)
+    assert np.allclose(np.array(cv.ypred_cv, dtype=float), np.array(cv_ref.ypred_cv, dtype=float))
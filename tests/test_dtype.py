@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from cimcb_lite.model import PLS_SIMPLS
+from cimcb_lite.utils import scale
+
+
+def relative_error(a, b):
+    return np.linalg.norm(a - b) / np.linalg.norm(b)
+
+
+@pytest.mark.parametrize("solver", ["simpls", "kernel"])
+@pytest.mark.parametrize("offset", [0, 1e3])
+def test_float32_matches_float64(solver, offset):
+    """float32 stays float32 through train and test, and matches the float64 results (for data that is not centered too)."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(50, 400)) + offset
+    Y = rng.randint(0, 2, 50)
+    Xtest = rng.normal(size=(20, 400)) + offset
+
+    model64 = PLS_SIMPLS(n_components=3, solver=solver)
+    y_pred64 = model64.train(X, Y)
+    model32 = PLS_SIMPLS(n_components=3, solver=solver, dtype=np.float32)
+    y_pred32 = model32.train(X.astype(np.float32), Y)
+
+    assert model32.model.beta_.dtype == np.float32
+    assert model32.model.x_scores_.dtype == np.float32
+    assert y_pred32.dtype == np.float32
+    assert relative_error(model32.model.coef_, model64.model.coef_) < 1e-3
+    assert relative_error(y_pred32, y_pred64) < 1e-4
+
+    y_test32 = model32.test(Xtest.astype(np.float32))
+    assert y_test32.dtype == np.float32
+    assert relative_error(y_test32, model64.test(Xtest)) < 1e-4
+
+
+def test_scale_float32():
+    rng = np.random.RandomState(1)
+    X = rng.lognormal(size=(30, 10)) + 100
+    z32 = scale(X.astype(np.float32), dtype=np.float32)
+    assert z32.dtype == np.float32
+    assert np.max(np.abs(z32 - scale(X))) < 1e-4
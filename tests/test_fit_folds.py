@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+import scipy.sparse
+from cimcb_lite.model import PLS_SIMPLS
+
+
+@pytest.mark.parametrize("shape", [(40, 300), (60, 20)])
+@pytest.mark.parametrize("sparse", [False, True])
+def test_fit_folds_matches_fit_path(shape, sparse):
+    """The downdated fold fits (kernel form for wide data, X0' * X0 otherwise) match a path fit on the training rows of each fold."""
+    rng = np.random.RandomState(0)
+    n, p = shape
+    X = (rng.normal(size=shape) + 5) * (rng.rand(*shape) < 0.3)
+    Y = rng.randint(0, 2, n)
+    testidx = np.array_split(rng.permutation(n), 5)
+
+    model = PLS_SIMPLS(n_components=4)
+    beta_folds = model.fit_folds(scipy.sparse.csr_matrix(X) if sparse else X, Y, testidx)
+    assert beta_folds.shape == (5, p + 1, 4)
+    for test, beta_path in zip(testidx, beta_folds):
+        train = np.setdiff1d(np.arange(n), test)
+        beta_ref = PLS_SIMPLS(n_components=4, solver="simpls").fit_path(X[train], Y[train])
+        assert np.allclose(beta_path, beta_ref, rtol=1e-8, atol=1e-10)
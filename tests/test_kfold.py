@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from cimcb_lite.cross_val import kfold
+from cimcb_lite.model import PLS_SIMPLS
+
+
+def data():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(40, 30))
+    Y = np.repeat([0, 1], 20)
+    X[Y == 1, :5] += 1
+    return X, Y
+
+
+@pytest.mark.parametrize("param_dict", [{"n_components": [1, 2, 3]}, {"n_components": [1, 2], "solver": ["simpls"]}])
+def test_kfold_checks(param_dict):
+    """Y and X are checked up front, for the n_components path (which does not use train) and for the train path."""
+    X, Y = data()
+    with pytest.raises(ValueError, match="0s and 1s"):
+        kfold(PLS_SIMPLS, X, Y + 1, param_dict, folds=5)
+    with pytest.raises(ValueError, match="0s and 1s"):
+        kfold(PLS_SIMPLS, X, np.zeros(40), param_dict, folds=5)
+    X[3, 4] = np.nan
+    with pytest.raises(ValueError, match="NaNs found in X"):
+        kfold(PLS_SIMPLS, X, Y, param_dict, folds=5)
+
+
+def test_kfold_path():
+    """The n_components path matches a model trained for each n_components."""
+    X, Y = data()
+    cv = kfold(PLS_SIMPLS, X, Y, {"n_components": [1, 2, 3]}, folds=5, bootnum=1)
+    assert cv._use_path()
+    cv.calc_ypred()
+    for ncomp, ypred_full in zip([1, 2, 3], cv.ypred_full):
+        model = PLS_SIMPLS(n_components=ncomp)
+        assert np.allclose(ypred_full, model.train(X, Y))
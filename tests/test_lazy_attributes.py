@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import scipy.sparse
+from cimcb_lite.model import PLS_SIMPLS
+
+
+def eager_vip_pctvar(model, X, sample_weight=None):
+    """vip_ and pctvar_ as calculated in train before they were made lazy (pctvar_ with the weighted sum of squares if sample_weight is given)."""
+    Weights = model.model.x_weights_
+    W0 = Weights / np.sqrt(np.sum(Weights ** 2, axis=0))
+    sumSq = np.sum(model.model.x_scores_ ** 2, axis=0) * np.sum(model.model.y_loadings_ ** 2, axis=0)
+    vip = np.sqrt(len(model.model.x_loadings_) * np.sum(sumSq * W0 ** 2, axis=1) / np.sum(sumSq, axis=0))
+    w = np.ones(len(X)) if sample_weight is None else sample_weight
+    meanX = w @ X / np.sum(w)
+    pctvar = np.sum(abs(model.model.x_loadings_) ** 2, axis=0) / np.sum(w[:, np.newaxis] * (X - meanX) ** 2) * 100
+    return vip, pctvar
+
+
+@pytest.mark.parametrize("kind", ["dense", "weighted", "sparse", "memmap", "not_retained"])
+def test_lazy_vip_pctvar(kind, tmp_path):
+    """vip_ and pctvar_ (calculated when first accessed) match the values calculated at the end of train."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(40, 25)) * (rng.rand(40, 25) < 0.5) + 3
+    Y = np.repeat([0, 1], 20)
+    sample_weight = rng.rand(40) if kind == "weighted" else None
+
+    model = PLS_SIMPLS(n_components=3, retain_training_data=kind != "not_retained")
+    if kind == "sparse":
+        model.train(scipy.sparse.csr_matrix(X), Y)
+    elif kind == "memmap":
+        np.save(str(tmp_path / "X.npy"), X)
+        model.train(str(tmp_path / "X.npy"), Y)
+    else:
+        model.train(X, Y, sample_weight=sample_weight)
+    assert model.model._vip is None
+    assert model.model._pctvar is None
+
+    vip, pctvar = eager_vip_pctvar(model, X, sample_weight)
+    assert np.allclose(model.model.pctvar_, pctvar, rtol=1e-10)
+    assert np.allclose(model.model.vip_, vip, rtol=1e-10)
+    # pctvar_ only needs the sum of squares, so the training X is released once it is calculated
+    assert model.model._X is None
+
+
+def test_lazy_vip_pctvar_set():
+    """vip_ and pctvar_ can be set directly (e.g. by load), and are then not recalculated."""
+    rng = np.random.RandomState(1)
+    model = PLS_SIMPLS(n_components=2)
+    model.train(rng.normal(size=(30, 10)), np.repeat([0, 1], 15))
+    model.model.vip_ = np.ones(10)
+    model.model.pctvar_ = np.array([50.0, 20.0])
+    assert np.array_equal(model.model.vip_, np.ones(10))
+    assert np.array_equal(model.model.pctvar_, [50.0, 20.0])
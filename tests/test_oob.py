@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+import cimcb_lite.model.BaseModel
+from cimcb_lite.bootstrap import Perc
+from cimcb_lite.model import PLS_SIMPLS
+from cimcb_lite.utils import binary_metrics
+
+
+def data():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(40, 15))
+    Y = np.repeat([0, 1], 20)
+    X[Y == 1, :3] += 1
+    return X, Y
+
+
+def test_oob_predictions():
+    """Each sample's out-of-bag prediction is the mean score of the resample models that left it out, and oob_stats are its binary_metrics."""
+    X, Y = data()
+    model = PLS_SIMPLS(n_components=2)
+    model.train(X, Y)
+    boot = Perc(model, X, Y, ["model.coef_"], bootnum=15, seed=0, oob=True)
+    boot.run()
+
+    ypred_sum = np.zeros(len(Y))
+    count = np.zeros(len(Y))
+    for bootidx in boot.bootidx:
+        oob = ~np.isin(np.arange(len(Y)), bootidx)
+        model_i = model.clone()
+        model_i.train(X[bootidx], Y[bootidx])
+        ypred_sum[oob] += model_i.test(X[oob])
+        count[oob] += 1
+    valid = count > 0
+    assert np.array_equal(~np.isnan(boot.ypred_oob), valid)
+    assert np.allclose(boot.ypred_oob[valid], ypred_sum[valid] / count[valid])
+    assert boot.oob_stats == pytest.approx(binary_metrics(Y[valid], boot.ypred_oob[valid]))
+
+    # Multinomial weights (the same resamples as sample weights on the original X) give the same out-of-bag predictions
+    boot_weighted = Perc(model, X, Y, ["model.coef_"], bootnum=15, seed=0, weights="multinomial", oob=True)
+    boot_weighted.run()
+    assert np.allclose(boot_weighted.ypred_oob[valid], boot.ypred_oob[valid])
+
+
+def test_oob_bayesian():
+    X, Y = data()
+    model = PLS_SIMPLS(n_components=2)
+    model.train(X, Y)
+    with pytest.raises(ValueError, match="Bayesian"):
+        model.calc_bootci(bootnum=5, weights="bayesian", oob=True)
+
+
+def test_evaluate_oob(monkeypatch):
+    """evaluate(testset='oob') evaluates the out-of-bag predictions (leaving out the samples that were in every resample) as the test set."""
+    X, Y = data()
+    model = PLS_SIMPLS(n_components=2)
+    model.train(X, Y)
+    with pytest.raises(ValueError, match="oob=True"):
+        model.evaluate(testset="oob")
+
+    model.calc_bootci(bootnum=15, type="perc", oob=True)
+    valid = ~np.isnan(model.Y_pred_oob)
+    assert model.oob_metrics == pytest.approx(binary_metrics(Y[valid], model.Y_pred_oob[valid]))
+
+    # Record the test set scored by evaluate (and don't render the figure)
+    calls = []
+
+    def binary_metrics_spy(y_true, y_pred, **kwargs):
+        calls.append((y_true, y_pred))
+        return binary_metrics(y_true, y_pred, **kwargs)
+
+    monkeypatch.setattr(cimcb_lite.model.BaseModel, "binary_metrics", binary_metrics_spy)
+    monkeypatch.setattr(cimcb_lite.model.BaseModel, "show", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cimcb_lite.model.BaseModel, "output_notebook", lambda *args, **kwargs: None)
+    model.evaluate(testset="oob", bootnum=10)
+    assert len(calls) == 1
+    assert np.array_equal(calls[0][0], Y[valid])
+    assert np.array_equal(calls[0][1], model.Y_pred_oob[valid])
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cimcb_lite.model import PLS_SIMPLS
+
+
+def relative_error(a, b):
+    return np.linalg.norm(a - b) / np.linalg.norm(b)
+
+
+@pytest.mark.parametrize("n_features", [20, 500])
+def test_partial_fit_matches_train(n_features):
+    """partial_fit over several batches matches train on all the batches combined (narrow data, and wide data where X'*X is kept as a factor)."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(120, n_features)) + rng.uniform(0, 100, n_features)
+    Y = rng.randint(0, 2, 120)
+
+    model_full = PLS_SIMPLS(n_components=3)
+    model_full.train(X, Y)
+
+    model = PLS_SIMPLS(n_components=3)
+    for batch in np.array_split(np.arange(120), [10, 45, 50, 100]):
+        y_pred_batch = model.partial_fit(X[batch], Y[batch])
+    assert model._partial_state["L"].shape[0] <= n_features
+
+    assert relative_error(model.model.beta_, model_full.model.beta_) < 1e-8
+    assert relative_error(model.model.vip_, model_full.model.vip_) < 1e-8
+    assert relative_error(model.model.pctvar_, model_full.model.pctvar_) < 1e-8
+    assert relative_error(y_pred_batch, model_full.test(X[100:])) < 1e-8
+
+
+def test_partial_fit_dataframe_columns():
+    rng = np.random.RandomState(1)
+    columns = ["M{}".format(i) for i in range(15)]
+    X = pd.DataFrame(rng.normal(size=(60, 15)), columns=columns)
+    Y = np.tile([0, 1], 30)
+
+    model_full = PLS_SIMPLS(n_components=2)
+    model_full.train(X, Y)
+
+    # Later batches have their columns in a different order
+    model = PLS_SIMPLS(n_components=2)
+    model.partial_fit(X.iloc[:30], Y[:30])
+    model.partial_fit(X.iloc[30:, ::-1], Y[30:])
+    assert relative_error(model.model.beta_, model_full.model.beta_) < 1e-8
+
+
+def test_partial_fit_one_group():
+    model = PLS_SIMPLS(n_components=2)
+    assert model.partial_fit(np.ones((5, 4)) + np.arange(20).reshape(5, 4) ** 2, np.zeros(5)) is None
+    with pytest.raises(ValueError):
+        model.partial_fit(np.zeros((0, 4)), np.zeros(0))
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from cimcb_lite.model import PLS_SIMPLS
+
+
+def relative_error(a, b):
+    return np.linalg.norm(a - b) / np.linalg.norm(b)
+
+
+@pytest.mark.parametrize("dtype, offset, tol", [(np.float64, 1e6, 1e-8), (np.float32, 1e3, 1e-3)])
+def test_kernel_large_column_offset(dtype, offset, tol):
+    """The kernel solver (used by solver='auto' for wide data with many components) matches SIMPLS on the centered data when the column means are large."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(50, 400))
+    Y = rng.randint(0, 2, 50)
+
+    model_ref = PLS_SIMPLS(n_components=2, solver="simpls")
+    model_ref.train(X, Y)
+
+    model = PLS_SIMPLS(n_components=2, solver="kernel", dtype=dtype)
+    model.train((X + offset).astype(dtype), Y)
+    assert relative_error(model.model.coef_, model_ref.model.coef_) < tol
+
+
+def test_kernel_large_column_offset_weighted():
+    rng = np.random.RandomState(1)
+    X = rng.normal(size=(30, 300))
+    Y = rng.randint(0, 2, 30)
+    sample_weight = rng.rand(30)
+
+    model_ref = PLS_SIMPLS(n_components=2, solver="simpls")
+    model_ref.train(X, Y, sample_weight=sample_weight)
+
+    model = PLS_SIMPLS(n_components=2, solver="kernel")
+    model.train(X + 1e6, Y, sample_weight=sample_weight)
+    assert relative_error(model.model.coef_, model_ref.model.coef_) < 1e-8
+
+
+def test_auto_solver():
+    """solver='auto' only uses the kernel form for wide data with many components (forming X0 * X0' is slower than SIMPLS for a few components)."""
+    model = PLS_SIMPLS(n_components=2)
+    assert model._select_solver(np.zeros((100, 10000)), 2) == "simpls"
+    assert model._select_solver(np.zeros((300, 50000)), 5) == "simpls"
+    assert model._select_solver(np.zeros((100, 10000)), 10) == "kernel"
+    assert model._select_solver(np.zeros((300, 200)), 20) == "simpls"
+    assert PLS_SIMPLS(n_components=2, solver="kernel")._select_solver(np.zeros((100, 10000)), 2) == "kernel"
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cimcb_lite.model import PLS_SIMPLS
+
+
+def test_predict_dataframe_columns():
+    """predict matches DataFrame columns to the training peaks by name (reordered, extra and missing columns)."""
+    rng = np.random.RandomState(0)
+    columns = ["M{}".format(i) for i in range(2000)]
+    X = pd.DataFrame(rng.normal(size=(30, 2000)), columns=columns)
+    Y = np.tile([0, 1], 15)
+    model = PLS_SIMPLS(n_components=2)
+    y_pred = model.train(X, Y)
+
+    Xtest = X.iloc[:, ::-1].copy()
+    Xtest["extra"] = 1.0
+    assert np.max(np.abs(model.predict(Xtest) - y_pred)) < 1e-10
+    with pytest.raises(ValueError, match="does not contain 1 of the peaks"):
+        model.predict(X.drop(columns="M5"))
+
+
+def test_frozen_scorer_dataframe_columns():
+    rng = np.random.RandomState(1)
+    columns = ["M{}".format(i) for i in range(50)]
+    X = pd.DataFrame(rng.normal(size=(30, 50)), columns=columns)
+    Y = np.tile([0, 1], 15)
+    model = PLS_SIMPLS(n_components=2)
+    y_pred = model.train(X, Y)
+
+    scorer = model.freeze(np.zeros(50), np.ones(50), method="auto")
+    assert np.max(np.abs(scorer.test(X.iloc[:, ::-1]) - y_pred)) < 1e-10
+    with pytest.raises(ValueError, match="should be unique"):
+        scorer.test(pd.concat([X, X[["M0"]]], axis=1))
+
+
+def test_predict_bagged():
+    """predict_bagged scores every bootstrap model (the columns of bootbag), and matches DataFrame columns to the training peaks by name."""
+    rng = np.random.RandomState(2)
+    columns = ["M{}".format(i) for i in range(40)]
+    X = pd.DataFrame(rng.normal(size=(30, 40)), columns=columns)
+    Y = np.tile([0, 1], 15)
+    model = PLS_SIMPLS(n_components=2)
+    model.train(X, Y)
+    with pytest.raises(ValueError, match="calc_bootci"):
+        model.predict_bagged(X)
+
+    model.calc_bootci(bootnum=20, type="perc")
+    assert model.bootbag.shape == (41, 20)
+    y_pred_boot = np.column_stack([X.values @ beta[1:] + beta[0] for beta in model.bootbag.T])
+    y_pred_mean, y_pred_ci = model.predict_bagged(X)
+    assert np.allclose(y_pred_mean, np.mean(y_pred_boot, axis=1))
+    assert np.allclose(y_pred_ci, np.percentile(y_pred_boot, [2.5, 97.5], axis=1).T)
+
+    Xtest = X.iloc[:, ::-1].copy()
+    Xtest["extra"] = 1.0
+    y_pred_mean_reordered, y_pred_ci_reordered = model.predict_bagged(Xtest)
+    assert np.allclose(y_pred_mean_reordered, y_pred_mean)
+    assert np.allclose(y_pred_ci_reordered, y_pred_ci)
+    with pytest.raises(ValueError, match="does not contain 1 of the peaks"):
+        model.predict_bagged(X.drop(columns="M5"))
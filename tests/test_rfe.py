@@ -0,0 +1,37 @@
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+from cimcb_lite.model import PLS_SIMPLS
+from cimcb_lite.utils import binary_metrics
+
+
+def test_rfe_large_column_offset():
+    """R² along the elimination path (downdated gram) matches a fresh fit to the kept peaks when the column means are large."""
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(40, 60)) + 1e5
+    Y = np.repeat([0, 1], 20)
+
+    rfe_table = PLS_SIMPLS(n_components=2).rfe(X, Y, step=5)
+    assert rfe_table["n_features"].iloc[0] == 60
+    assert rfe_table["n_features"].iloc[-1] == 2
+    for features, r2 in zip(rfe_table["features"], rfe_table["R²"]):
+        model = PLS_SIMPLS(n_components=2, solver="simpls")
+        y_pred = model.train(X[:, features] - 1e5, Y)
+        assert abs(binary_metrics(Y, y_pred)["R²"] - r2) < 1e-8
+
+
+def test_rfe_q2_matches_fold_fits():
+    """Q² from the blocks of the downdated gram matches fold fits to the kept peaks (the peaks are moved within X0 as they are removed)."""
+    rng = np.random.RandomState(1)
+    X = rng.normal(size=(40, 80)) + 10
+    Y = np.repeat([0, 1], 20)
+    X[Y == 1, :5] += 1
+
+    rfe_table = PLS_SIMPLS(n_components=2).rfe(X, Y, step=7, folds=5)
+    testidx = [test for train, test in StratifiedKFold(n_splits=5).split(X, Y)]
+    for features, q2 in zip(rfe_table["features"], rfe_table["Q²"]):
+        assert np.all(np.diff(features) > 0)
+        beta_folds = PLS_SIMPLS(n_components=2).fit_folds(X[:, features], Y, testidx)[:, :, -1]
+        y_pred = np.zeros(len(Y))
+        for test, beta in zip(testidx, beta_folds):
+            y_pred[test] = X[test][:, features] @ beta[1:] + beta[0]
+        assert abs(binary_metrics(Y, y_pred)["R²"] - q2) < 1e-8
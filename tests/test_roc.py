@@ -0,0 +1,21 @@
+import numpy as np
+from cimcb_lite.plot import roc_calculate, roc_calculate_many
+
+
+def test_roc_calculate_many_matches_roc_calculate():
+    """The batched bootstrap (all columns of a resample at once) matches roc_calculate for each column, including tied scores."""
+    rng = np.random.RandomState(0)
+    Y = rng.randint(0, 2, 50)
+    Yscores = rng.normal(size=(50, 6))
+    Yscores[:, ::2] = np.round(Yscores[:, ::2], 1)
+    Yscores[Y == 1] += 0.5
+
+    np.random.seed(1)
+    rocs = roc_calculate_many(Y, Yscores, bootnum=50)
+    for j, (fpr, tpr, tpr_ci) in enumerate(rocs):
+        # roc_calculate draws the same resamples from the same seed
+        np.random.seed(1)
+        fpr_ref, tpr_ref, tpr_ci_ref = roc_calculate(Y, Yscores[:, j], bootnum=50)
+        assert np.array_equal(fpr, fpr_ref)
+        assert np.array_equal(tpr, tpr_ref)
+        assert np.allclose(tpr_ci, tpr_ci_ref)
@@ -0,0 +1,108 @@
+import json
+import socket
+import threading
+import time
+import urllib.request
+import numpy as np
+import pytest
+from cimcb_lite.model import PLS_SIMPLS
+from cimcb_lite.serve import MicroBatcher, ScoringServer
+
+
+@pytest.fixture
+def model():
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(40, 10))
+    Y = np.repeat([0, 1], 20)
+    model = PLS_SIMPLS(n_components=2)
+    model.train(X, Y)
+    return model
+
+
+def run_server(server, method, *args):
+    """Start server.method in a thread and wait until it is listening."""
+    thread = threading.Thread(target=getattr(server, method), args=args, daemon=True)
+    thread.start()
+    for i in range(500):
+        if server._server is not None:
+            return thread
+        time.sleep(0.01)
+    raise RuntimeError("server did not start")
+
+
+def test_microbatcher_coalesces(model):
+    """Concurrent requests are scored in shared batches, and each request gets its own rows back."""
+    X = np.random.RandomState(1).normal(size=(16, 10))
+    y_ref = model.test(X)
+    batcher = MicroBatcher(model, max_batch=64, max_wait=0.5)
+    start = threading.Barrier(8)
+    y_pred = [None] * 8
+
+    def submit(i):
+        start.wait()
+        y_pred[i] = batcher.submit(X[2 * i : 2 * i + 2])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    for i in range(8):
+        assert np.allclose(y_pred[i], y_ref[2 * i : 2 * i + 2])
+    stats = batcher.stats()
+    assert stats["n_requests"] == 8
+    assert stats["n_samples"] == 16
+    assert stats["n_batches"] < 8
+
+
+@pytest.mark.parametrize("request_", [[1, 2], "X", 1, None, {"model": "missing", "X": [[0] * 10]}, {"model": "m"}, {"model": "m", "X": [[0] * 3]}, {"model": "m", "X": [["a"] * 10]}])
+def test_handle_malformed(model, request_):
+    server = ScoringServer({"m": model})
+    try:
+        assert "error" in server.handle(request_)
+    finally:
+        server.close()
+
+
+def test_unix_socket(model, tmp_path):
+    """Malformed lines get an error response, and the connection keeps serving the next lines."""
+    X = np.ones((3, 10))
+    server = ScoringServer({"m": model})
+    path = str(tmp_path / "cimcb.sock")
+    run_server(server, "serve_unix", path)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(b"[1, 2]\nnot json\n" + json.dumps({"model": "m", "X": X.tolist()}).encode("utf-8") + b'\n{"stats": true}\n')
+            lines = sock.makefile("rb").readline
+            responses = [json.loads(lines()) for i in range(4)]
+    finally:
+        server.close()
+    assert "error" in responses[0]
+    assert "error" in responses[1]
+    assert np.allclose(responses[2]["y_pred"], model.test(X))
+    assert responses[3]["m"]["n_requests"] == 1
+
+
+def test_http(model):
+    X = np.ones((3, 10))
+    server = ScoringServer({"m": model})
+    run_server(server, "serve_http", "127.0.0.1", 0)
+    url = "http://127.0.0.1:{}".format(server._server.server_address[1])
+    try:
+        request = urllib.request.Request(url + "/predict/m", data=json.dumps({"X": X.tolist()}).encode("utf-8"), method="POST")
+        with urllib.request.urlopen(request) as response:
+            assert np.allclose(json.loads(response.read())["y_pred"], model.test(X))
+        request = urllib.request.Request(url + "/predict/m", data=b"[1, 2]", method="POST")
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(request)
+        assert e.value.code == 400
+        with urllib.request.urlopen(url + "/stats") as response:
+            stats = json.loads(response.read())
+    finally:
+        server.close()
+    assert stats["m"]["n_requests"] == 1
+    assert stats["m"]["n_samples"] == 3
+    assert stats["m"]["p50_ms"] is not None